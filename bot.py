@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 # Core Imports
+import asyncio
+import contextlib
+import time
 import traceback
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Third Party Packages
 import aiohttp
@@ -11,41 +14,125 @@ from discord.ext import commands
 from prisma import Prisma
 
 # Local Imports
-from cogs import COGS
+from cogs import COG_DEPENDENCIES, COG_REQUIREMENTS, COGS
+from helpers.intents import CachePolicy, CogRequirements, resolve_cache_policy
 from helpers.ipc.routes import ExultBotIPC
 from helpers.logger import Logger
+from helpers.messages import MessageIndex
+from helpers.mutuals import MutualGuildIndex
 from helpers.regex import RegEx
+from helpers.stats import StatsTracker
 from helpers.tree import Tree
+from helpers.usage import UsageTracker
+from helpers.users import UserResolver
 
 
-class ExultBot(commands.Bot):
-    """The main Discord Bot class"""
+# What the bot itself needs on top of the requirements declared by our cogs
+CORE_REQUIREMENTS: Dict[str, CogRequirements] = {
+    "core": CogRequirements(
+        discord.Intents(guilds=True), "Guild, channel, role and emoji caches"
+    ),
+    "jishaku": CogRequirements(
+        discord.Intents(guild_messages=True, dm_messages=True, message_content=True),
+        "Prefix commands",
+    ),
+    # Only required when the IPC server is enabled, see `ExultBot.__init__`
+    "ipc": CogRequirements(
+        discord.Intents(members=True),
+        "The dashboard lists the guilds we share with a user",
+        member_cache=True,
+        chunk_guilds=True,
+    ),
+}
+
+
+class ExultBot(commands.AutoShardedBot):
+    """
+    The main Discord Bot class.
+
+    Runs every shard in one process by default. When started as one cluster of
+    many, `shard_ids` is the range of shards owned by this process and `cluster_id`
+    identifies it, see `launcher.py`.
+    """
 
     _is_ready: bool
+    cache_policy: CachePolicy
+    cluster_id: Optional[int]
     db: Prisma
     guilds_to_sync: Tuple[int, ...]
-    ipc: ExultBotIPC
+    ipc: Optional[ExultBotIPC]
+    ipc_enabled: bool
+    ipc_peers: Dict[int, int]
+    ipc_port: int
     logger: Logger
+    message_index: MessageIndex
+    mutual_index: Optional[MutualGuildIndex]
     regex: RegEx
     session: aiohttp.ClientSession
+    stats: StatsTracker
     sync_on_ready: bool
+    usage: UsageTracker
     user: discord.ClientUser
+    user_resolver: UserResolver
 
     def __init__(
-        self, *, sync_on_ready: bool = False, guilds_to_sync: Tuple[int, ...] = ()
+        self,
+        *,
+        sync_on_ready: bool = False,
+        guilds_to_sync: Tuple[int, ...] = (),
+        member_cache: Optional[bool] = None,
+        chunk_guilds: Optional[bool] = None,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        cluster_id: Optional[int] = None,
+        ipc: bool = True,
+        ipc_port: int = 3000,
+        ipc_peers: Optional[Dict[int, int]] = None,
     ) -> None:
         self._is_ready = False
+        self.cluster_id = cluster_id
         self.guilds_to_sync = guilds_to_sync
-        self.logger = Logger("ExultBot", console=True)
+        self.ipc_enabled = ipc
+        self.ipc_peers = ipc_peers or {}
+        self.ipc_port = ipc_port
+        self.logger = Logger(
+            "ExultBot" if cluster_id is None else f"ExultBot-{cluster_id}", console=True
+        )
+        self.message_index = MessageIndex(self)
         self.regex = RegEx()
         self.sync_on_ready = sync_on_ready
 
+        # Only request the intents and caches that our cogs actually use, the member
+        # cache and guild chunking can be overridden from the launcher. Requirements
+        # are declared up front, so our cogs aren't imported until they are loaded.
+        self.cache_policy = resolve_cache_policy(
+            COGS,
+            COG_REQUIREMENTS,
+            # The mutual guild index behind our IPC server needs every member cached
+            extra={
+                name: requirements
+                for name, requirements in CORE_REQUIREMENTS.items()
+                if name != "ipc" or ipc
+            },
+            member_cache=member_cache,
+            chunk_guilds=chunk_guilds,
+        )
+        self.logger.info(self.cache_policy.report())
+
         super().__init__(
             command_prefix="e!",
             description="An all-in-one feature rich bot that has moderation, utility and more!",
-            intents=discord.Intents.all(),  # All until we know exactly what intents we need
+            intents=self.cache_policy.intents,
+            member_cache_flags=self.cache_policy.member_cache_flags,
+            chunk_guilds_at_startup=self.cache_policy.chunk_guilds_at_startup,
+            max_messages=self.cache_policy.max_messages,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
             tree_cls=Tree,
         )
+        self.stats = StatsTracker(self)
+        self.mutual_index = MutualGuildIndex(self) if ipc else None
+        self.user_resolver = UserResolver(self)
 
         # Setting this decides who can use owner-only commands such as jsk
         self.owner_ids = {
@@ -60,21 +147,57 @@ class ExultBot(commands.Bot):
 
         Mainly used to load our cogs / extensions.
         """
-        # Jishaku is our debugging tool installed from PyPi
-        await self.load_extension("jishaku")
-        loaded_cogs = 1
+        # Jishaku is our debugging tool installed from PyPi, loaded alongside our
+        # local extensions (cogs). Extensions are loaded in waves, each wave being
+        # every extension whose dependencies have already been loaded. Importing an
+        # extension blocks the event loop, so imports still run one after another,
+        # only the awaits of their `setup` and `cog_load` overlap within a wave.
+        remaining = ["jishaku", *COGS]
+        loaded: List[str] = []
+        failed: List[str] = []
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
 
-        # Looping through and loading our local extensions (cogs)
-        for cog in COGS:
-            try:
-                await self.load_extension(cog)
-                loaded_cogs += 1
-            except Exception as e:
-                tb = traceback.format_exc()
-                self.logger.error(f"{type(e)} Exception in loading {cog}\n{tb}")
-                continue
+        while remaining:
+            wave = [
+                ext
+                for ext in remaining
+                if all(d in loaded for d in COG_DEPENDENCIES.get(ext, ()))
+            ]
+            if not wave:
+                # Whatever is left depends on an extension that failed to load
+                self.logger.error(f"Skipped loading {remaining}, dependencies failed.")
+                failed.extend(remaining)
+                break
+
+            results = await asyncio.gather(*(self._load_timed(ext) for ext in wave))
+            for ext, (ok, elapsed) in zip(wave, results):
+                timings[ext] = elapsed
+                remaining.remove(ext)
+                (loaded if ok else failed).append(ext)
+
+        # Per extension timings (import included), slowest first
+        total = time.perf_counter() - start
+        lines: List[str] = []
+        for ext in sorted(timings, key=timings.__getitem__, reverse=True):
+            line = f"- {ext}: {timings[ext] * 1000:.0f}ms"
+            lines.append(line + (" (failed)" if ext in failed else ""))
+        self.logger.info(
+            f"Successfully loaded {len(loaded)}/{len(COGS)+1} cogs "
+            f"in {total * 1000:.0f}ms!\n" + "\n".join(lines)
+        )
+
+    async def _load_timed(self, extension: str) -> Tuple[bool, float]:
+        """Loads an extension, returning whether it loaded and how long it took"""
 
-        self.logger.info(f"Successfully loaded {loaded_cogs}/{len(COGS)+1} cogs!")
+        start = time.perf_counter()
+        try:
+            await self.load_extension(extension)
+            return True, time.perf_counter() - start
+        except Exception as e:
+            tb = traceback.format_exc()
+            self.logger.error(f"{type(e)} Exception in loading {extension}\n{tb}")
+            return False, time.perf_counter() - start
 
     async def on_ready(self) -> None:
         """
@@ -129,15 +252,50 @@ class ExultBot(commands.Bot):
         from Discord.
         """
         self.logger.info("Starting Bot...")
-        async with aiohttp.ClientSession() as self.session, Prisma() as self.db, ExultBotIPC(
-            self
-        ) as self.ipc:
-            # Initialises our ClientSession, Database connection and IPC server as bot variables.
+        ipc = (
+            ExultBotIPC(self, port=self.ipc_port)
+            if self.ipc_enabled
+            else contextlib.nullcontext(None)
+        )
+        async with (
+            aiohttp.ClientSession() as self.session,
+            Prisma() as self.db,
+            ipc as self.ipc,
+            UsageTracker(self) as self.usage,
+        ):
+            # Initialises our ClientSession, Database connection, IPC server (unless it
+            # is disabled) and usage tracker as bot variables. The usage tracker is
+            # entered last so that its final flush happens before our database
+            # connection is closed.
             try:
                 await super().start(token, reconnect=reconnect)
             finally:
+                # Closing unloads our cogs, which is done here whilst the database is
+                # still connected so that they can write out anything they buffer
+                if not self.is_closed():
+                    await self.close()
                 self.logger.info("Shutdown Bot.")
 
+    @property
+    def cached_user_count(self) -> int:
+        """
+        The number of unique users in our cache.
+
+        This copies the user cache into a list, which is fine for how rarely our
+        stats are snapshotted (at most every few seconds, see `/stats`).
+        """
+        return len(self.users)
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """
+        Whether the given guild belongs to one of this process's shards, regardless of
+        whether the guild has been received from Discord yet.
+        """
+
+        if self.shard_ids is None or self.shard_count is None:
+            return True
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
     def get_partial_emoji_with_state(
         self, name: str, animated: bool = False, id: Optional[int] = None
     ) -> discord.PartialEmoji:
@@ -155,14 +313,10 @@ class ExultBot(commands.Bot):
     async def get_or_fetch_user(self, user_id: int) -> Optional[discord.User]:
         """
         A coroutine that attempts to retrieve a :class:`~discord.User` based on their ID
-        from the bot's user cache.
+        from the bot's user caches.
 
-        If the user cannot be found then it attempts to fetch the user directly from
-        the Discord API.
+        If the user cannot be found then it fetches the user from the Discord API
+        through our :class:`UserResolver`, returning None if the ID provided does not
+        correlate to an existing Discord User.
         """
-        try:
-            return self.get_user(user_id) or await self.fetch_user(user_id)
-        except discord.HTTPException:
-            # If this exception is called then the ID provided does not correlate
-            # to an existing Discord User
-            return None
+        return await self.user_resolver.resolve(user_id)
@@ -1,6 +1,52 @@
 """Contains all custom extensions used by the bot"""
 
 # Core Imports
-from typing import Tuple
+from typing import Dict, Tuple
 
-COGS: Tuple[str, ...] = ("cogs.admin", "cogs.messages", "cogs.miscellaneous")
+# Third Party Packages
+import discord
+
+# Local Imports
+from helpers.intents import CogRequirements
+
+COGS: Tuple[str, ...] = (
+    "cogs.admin",
+    "cogs.autorole",
+    "cogs.events",
+    "cogs.messages",
+    "cogs.miscellaneous",
+)
+
+# Extensions that must be loaded before the given extension, any extension not listed
+# here is loaded concurrently with the others
+COG_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {}
+
+# The gateway intents and caches that each extension needs. These are kept here rather
+# than in the extensions themselves so that the bot can build its cache policy before
+# any of them are imported, which only happens once when they are loaded.
+COG_REQUIREMENTS: Dict[str, CogRequirements] = {
+    "cogs.admin": CogRequirements(
+        discord.Intents(guild_messages=True, dm_messages=True, message_content=True),
+        "Owner-only prefix commands",
+    ),
+    "cogs.autorole": CogRequirements(
+        discord.Intents(members=True),
+        "Assigns roles when members join or pass membership screening",
+        member_cache=True,
+    ),
+    "cogs.events": CogRequirements(
+        discord.Intents(members=True),
+        "Keeps the Member table in sync with the members of our guilds",
+        member_cache=True,
+        chunk_guilds=True,
+    ),
+    "cogs.messages": CogRequirements(
+        discord.Intents.none(),
+        "Only uses app commands, context menus receive the message they were used on",
+    ),
+    "cogs.miscellaneous": CogRequirements(
+        discord.Intents(emojis_and_stickers=True, members=True),
+        "Looks up guild emojis from the cache, bulk role jobs chunk their guild first",
+        member_cache=True,
+    ),
+}
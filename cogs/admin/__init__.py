@@ -4,6 +4,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 # Local Imports
+from .mutuals import MutualsCheck
 from .usage import Usage
 
 # Type Imports
@@ -11,11 +12,12 @@ if TYPE_CHECKING:
     from bot import ExultBot
 
 
-class AdminCog(Usage):
+class AdminCog(Usage, MutualsCheck):
     """
     Admin Cog - Contains everything regarding:
 
     - Usage Tracking and Usage mode commands
+    - Consistency checks of our in-memory indexes
     """
 
 
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+# Core Imports
+import time
+from typing import TYPE_CHECKING
+
+# Third Party Packages
+from discord.ext import commands
+
+# Local Imports
+from helpers.cog import Cog
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+
+class MutualsCheck(Cog):
+    """Contains owner-only commands for checking our mutual guild index"""
+
+    @commands.command(name="checkmutuals")
+    @commands.is_owner()
+    async def check_mutuals(
+        self, ctx: commands.Context[ExultBot], repair: bool = False
+    ) -> None:
+        """Compares the mutual guild index against the member cache, optionally repairing it"""
+
+        index = self.bot.mutual_index
+        if index is None:
+            await ctx.reply("The mutual guild index is disabled along with IPC.")
+            return
+
+        start = time.perf_counter()
+        missing, extra = index.verify(repair=repair)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if not missing and not extra:
+            result = "The mutual guild index is consistent with the member cache."
+        else:
+            result = (
+                f"The mutual guild index is missing {missing} and has {extra} extra "
+                "(user, guild) pairs." + (" It has been rebuilt." if repair else "")
+            )
+            self.logger.warn(result)
+        await ctx.reply(
+            f"{result}\n`{len(index)} users indexed, checked in {elapsed:.0f}ms`"
+        )
@@ -32,22 +32,8 @@ class Usage(Cog):
         itr: ExultInteraction,
         command: app_commands.Command[Any, ..., Any],
     ) -> None:
-        await itr.client.db.usage.upsert(
-            where={
-                "command_name_invoker_id": {
-                    "command_name": command.qualified_name,
-                    "invoker_id": itr.user.id,
-                }
-            },
-            data={
-                "create": {
-                    "command_name": command.qualified_name,
-                    "invoker_id": itr.user.id,
-                    "uses": 1,
-                },
-                "update": {"uses": {"increment": 1}},
-            },
-        )
+        # Usage is aggregated in memory and written in bulk by the tracker
+        await itr.client.usage.record(command.qualified_name, itr.user.id)
 
     @usage.command(
         name="mode",
@@ -63,6 +49,15 @@ class Usage(Cog):
         if not mode:
             return
 
+        await itr.client.db.user.upsert(
+            where={"user_id": itr.user.id},
+            data={
+                "create": {"user_id": itr.user.id, "usage_mode": mode},
+                "update": {"usage_mode": mode},
+            },
+        )
+        itr.client.usage.set_mode(itr.user.id, mode)
+
         content = f"We have updated your tacking settings to `{mode.value.title().replace('_', ' ')}`!"
         embed = Embed(
             title="Why do we track command usage?",
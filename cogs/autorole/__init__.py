@@ -7,13 +7,16 @@ from typing import List, TYPE_CHECKING
 import discord
 from discord import app_commands
 from prisma.enums import AutoroleMode
-from prisma.models import Guild
 
 # Local Imports
+from helpers.cache import TTLCache
 from helpers.cog import Cog
+from .queue import AssignmentQueue
 
 # Type Imports
 if TYPE_CHECKING:
+    from prisma.models import Guild
+
     from bot import ExultBot
     from helpers.types import ExultInteraction
 
@@ -26,8 +29,22 @@ class AutorolesCog(Cog):
     - Assigning autoroles
     """
 
+    assign_queue: AssignmentQueue
+    config_cache: TTLCache[int, Guild]
+
     def __init__(self, bot: ExultBot) -> None:
         super().__init__(bot)
+        # Guild configs are read on every member join / verification, so we keep
+        # them in memory and drop them whenever the config views change them.
+        self.config_cache = TTLCache(maxsize=10_000, ttl=900.0)
+        self.assign_queue = AssignmentQueue(bot, self.assign_queued_autoroles)
+
+    async def cog_load(self) -> None:
+        self.assign_queue.start()
+
+    async def cog_unload(self) -> None:
+        self.assign_queue.close()
+        self.logger.info(f"Autorole config cache stats: {self.config_cache.stats()}")
 
     autoroles_group = app_commands.Group(
         name="autoroles",
@@ -37,19 +54,29 @@ class AutorolesCog(Cog):
     )
 
     async def get_config(self, guild: discord.Guild) -> Guild:
-        func = self.bot.db.guild.find_unique(
-            {"guild_id": guild.id},
-            {"autorole_config": {"include": {"autoroles": True}}},
+        cached = self.config_cache.get(guild.id)
+        if cached is not None:
+            return cached
+
+        # Creates the guild if it hasn't been registered yet, e.g. whilst the
+        # reconciler is still catching up after a restart
+        config = await self.bot.db.guild.upsert(
+            where={"guild_id": guild.id},
+            data={"create": {"guild_id": guild.id}, "update": {}},
+            include={"autorole_config": {"include": {"autoroles": True}}},
         )
-        config = await func
-        tries = 0
-        while not config and tries > 3:
-            self.bot.dispatch("guild_join", guild)
-            config = await func
-        if not config:
-            raise Exception(f"Failed to get and/or create config for guild {guild.id}!")
+        self.config_cache.set(guild.id, config)
         return config
 
+    @Cog.listener("on_autorole_config_update")
+    async def invalidate_config(self, guild_id: int) -> None:
+        """Custom event dispatched whenever a guild's autorole config is modified"""
+        self.config_cache.invalidate(guild_id)
+
+    @Cog.listener("on_guild_remove")
+    async def invalidate_config_on_leave(self, guild: discord.Guild) -> None:
+        self.config_cache.invalidate(guild.id)
+
     async def assign_autoroles(self, config: Guild, member: discord.Member) -> None:
         if not member.guild.me.guild_permissions.manage_roles:
             return
@@ -70,6 +97,25 @@ class AutorolesCog(Cog):
                     f"Failed to assign autoroles to {member} in guild {member.guild.name} ({member.guild.id})! ~ {type(e): {e}}"
                 )
 
+    async def assign_queued_autoroles(
+        self, member: discord.Member, mode: AutoroleMode
+    ) -> None:
+        """
+        Called by our :class:`AssignmentQueue` once it reaches a queued member.
+
+        The config is checked again as it may have changed whilst the member was queued.
+        """
+        config = await self.get_config(member.guild)
+
+        if (
+            not config.autorole_config
+            or config.autorole_config.autorole_mode != mode
+            or not config.autorole_config.autoroles
+        ):
+            return
+
+        await self.assign_autoroles(config, member)
+
     @autoroles_group.command(name="config", description="Configure autoroles!")
     async def autoroles_config(self, itr: ExultInteraction) -> None:
         return
@@ -85,7 +131,7 @@ class AutorolesCog(Cog):
         ):
             return
 
-        await self.assign_autoroles(config, member)
+        self.assign_queue.put(member, AutoroleMode.on_join)
 
     @Cog.listener("on_member_update")
     async def assign_autoroles_on_verify(
@@ -101,7 +147,14 @@ class AutorolesCog(Cog):
             ):
                 return
 
-            await self.assign_autoroles(config, after)
+            self.assign_queue.put(after, AutoroleMode.on_verify)
+
+    @Cog.listener("on_raw_member_remove")
+    async def discard_queued_autoroles(
+        self, payload: discord.RawMemberRemoveEvent
+    ) -> None:
+        # The raw event also fires for members that have fallen out of our cache
+        self.assign_queue.discard(payload.guild_id, payload.user.id)
 
 
 async def setup(bot: ExultBot) -> None:
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+from typing import Any, Callable, Coroutine, Dict, List, Set, TYPE_CHECKING
+
+# Third Party Packages
+import discord
+from prisma.enums import AutoroleMode
+
+# Local Imports
+from helpers.logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("AssignmentQueue",)
+
+
+AssignCallback = Callable[[discord.Member, AutoroleMode], Coroutine[Any, Any, None]]
+
+
+class AssignmentQueue:
+    """
+    Coalesces autorole assignments into a queue per guild.
+
+    Join and verification events only record the member that needs roles. A fixed
+    pool of workers then drains one guild at a time, waiting `delay` seconds between
+    each assignment so that a raid or invite wave is spread out instead of hitting
+    Discord's per-guild rate limits all at once. Each worker hands a guild back to
+    the pool after `batch_size` members so one busy guild can't starve the rest.
+    """
+
+    _pending: Dict[int, Dict[int, AutoroleMode]]
+    _ready: asyncio.Queue[int]
+    _scheduled: Set[int]
+    _workers: List[asyncio.Task[None]]
+
+    def __init__(
+        self,
+        bot: ExultBot,
+        callback: AssignCallback,
+        *,
+        workers: int = 4,
+        delay: float = 1.0,
+        batch_size: int = 25,
+    ) -> None:
+        self.bot = bot
+        self.callback = callback
+        self.worker_count = workers
+        self.delay = delay
+        self.batch_size = batch_size
+        self.logger = Logger("AutoroleQueue")
+
+        # Guild ID -> {Member ID: mode that triggered the assignment}, in join order
+        self._pending = {}
+        # Guild IDs waiting for a worker, and those either waiting or being drained
+        self._ready = asyncio.Queue()
+        self._scheduled = set()
+        self._workers = []
+
+    @property
+    def depth(self) -> int:
+        """The total number of members waiting for autoroles across all guilds"""
+        return sum(len(members) for members in self._pending.values())
+
+    def guild_depth(self, guild_id: int) -> int:
+        """The number of members waiting for autoroles in the given guild"""
+        return len(self._pending.get(guild_id, {}))
+
+    def start(self) -> None:
+        """Starts the worker pool"""
+
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.worker_count)
+            ]
+
+    def close(self) -> None:
+        """Stops the worker pool, any queued assignments are dropped"""
+
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        if self.depth:
+            self.logger.warn(f"Dropped {self.depth} queued autorole assignments.")
+
+    def put(self, member: discord.Member, mode: AutoroleMode) -> None:
+        """Queues the given member to receive their guild's autoroles"""
+
+        guild_id = member.guild.id
+        self._pending.setdefault(guild_id, {})[member.id] = mode
+        if guild_id not in self._scheduled:
+            self._scheduled.add(guild_id)
+            self._ready.put_nowait(guild_id)
+
+    def discard(self, guild_id: int, member_id: int) -> None:
+        """Removes a member from the queue, e.g. because they left before being processed"""
+
+        members = self._pending.get(guild_id)
+        if members is not None:
+            members.pop(member_id, None)
+
+    async def _worker(self) -> None:
+        while True:
+            guild_id = await self._ready.get()
+            try:
+                await self._drain(guild_id)
+            except Exception as e:
+                self.logger.error(f"Autorole worker failed: {e}", guild_id=guild_id)
+            finally:
+                if self._pending.get(guild_id):
+                    # Give other guilds a turn before we continue with this one
+                    self._ready.put_nowait(guild_id)
+                else:
+                    self._pending.pop(guild_id, None)
+                    self._scheduled.discard(guild_id)
+
+    async def _drain(self, guild_id: int) -> None:
+        members = self._pending.get(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if not members or not guild:
+            if members is not None:
+                members.clear()
+            return
+
+        if len(members) > self.batch_size:
+            self.logger.info(
+                f"{len(members)} autorole assignments queued ({self.depth} total).",
+                guild_id=guild_id,
+            )
+
+        for _ in range(self.batch_size):
+            if not members:
+                break
+            member_id = next(iter(members))
+            mode = members.pop(member_id)
+
+            member = guild.get_member(member_id)
+            if member is None:
+                # The member left before we got to them
+                continue
+
+            await self.callback(member, mode)
+            await asyncio.sleep(self.delay)
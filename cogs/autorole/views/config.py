@@ -48,6 +48,7 @@ class ToggleAutoroles(ui.Button[ui.V]):
             {"guild_id": itr.guild.id},
             {"autoroles": True},
         )
+        itr.client.dispatch("autorole_config_update", itr.guild.id)
 
         if not config:
             return await itr.followup.send(
@@ -84,6 +85,7 @@ class ToggleMode(ui.Button[ui.V]):
             {"guild_id": itr.guild.id},
             {"autoroles": True},
         )
+        itr.client.dispatch("autorole_config_update", itr.guild.id)
 
         if not config:
             return await itr.followup.send(
@@ -186,6 +188,7 @@ class AutoroleSelector(ui.RoleSelect[ui.V]):
                 embed.add_field(name="Not Configured", value=roles)
             embed.colour = Colours.red
 
+        itr.client.dispatch("autorole_config_update", itr.guild.id)
         config = await itr.client.db.autoroleconfig.find_unique(
             {"guild_id": itr.guild.id}, {"autoroles": True}
         )
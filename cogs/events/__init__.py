@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import traceback
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 import discord
 from discord import app_commands
@@ -10,6 +11,10 @@ from discord.ext import commands
 from helpers.cog import Cog
 from helpers.colour import Colours
 from helpers.embed import Embed
+from .expiry import GuildSweeper
+from .reconcile import Reconciler
+from .registration import MemberRegistrar
+from .sync import MemberSync
 
 if TYPE_CHECKING:
     from bot import ExultBot
@@ -17,26 +22,55 @@ if TYPE_CHECKING:
 
 
 class BotEvents(Cog):
+    reconciler: Reconciler
+    reconcile_task: Optional[asyncio.Task[None]]
+    registrar: MemberRegistrar
+    sweeper: GuildSweeper
+    sync: MemberSync
+
+    def __init__(self, bot: ExultBot) -> None:
+        super().__init__(bot)
+        self.registrar = MemberRegistrar(bot)
+        self.sweeper = GuildSweeper(bot)
+        self.reconciler = Reconciler(bot, self.registrar, self.sweeper)
+        self.reconcile_task = None
+        self.sync = MemberSync(self.registrar)
+
+    async def cog_load(self) -> None:
+        self.sync.start()
+        self.sweeper.start()
+
+    async def cog_unload(self) -> None:
+        # The reconciler checkpoints as it goes and resumes on our next start
+        if self.reconcile_task is not None:
+            self.reconcile_task.cancel()
+        self.sweeper.close()
+        await self.sync.close()
+
+    async def reconcile(self) -> None:
+        try:
+            await self.reconciler.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            tb = traceback.format_exc()
+            self.logger.error(f"{type(e)} Failed to reconcile guilds and members:\n{tb}")
+
+    @Cog.listener("on_ready")
+    async def start_reconciliation(self) -> None:
+        """Reconciles the Guild and Member tables in the background once we are ready"""
+
+        if self.reconcile_task is None:
+            self.reconcile_task = asyncio.create_task(self.reconcile())
+
     async def register_guild(self, guild: discord.Guild) -> None:
         try:
-            await self.bot.db.guild.upsert(
-                {"guild_id": guild.id}, {"create": {"guild_id": guild.id}, "update": {}}
-            )
-            await self.bot.db.user.create_many(
-                [{"user_id": m.id} for m in guild.members if not m.bot],
-                skip_duplicates=True,
-            )
-            await self.bot.db.member.create_many(
-                [
-                    {"guild_id": guild.id, "member_id": m.id}
-                    for m in guild.members
-                    if not m.bot
-                ],
-                skip_duplicates=True,
-            )
+            await self.registrar.register_guild(guild)
         except Exception as e:
             tb = traceback.format_exc()
-            self.bot.logger.error(f"{type(e)} Failed to add guild to db:\n{tb}")
+            self.bot.logger.error(
+                f"{type(e)} Failed to add guild to db:\n{tb}", guild_id=guild.id
+            )
 
     @Cog.listener("on_guild_join")
     async def on_guild_join(
@@ -45,6 +79,26 @@ class BotEvents(Cog):
         await self.register_guild(guild)
         # TODO: Add logging for joining a guild
 
+    @Cog.listener("on_guild_remove")
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        # The guild's data is kept until it expires, in case we are added back
+        try:
+            await self.sweeper.mark_removed([guild.id])
+        except Exception as e:
+            self.bot.logger.error(
+                f"{type(e)} Failed to mark guild as removed: {e}", guild_id=guild.id
+            )
+
+    @Cog.listener("on_member_join")
+    async def sync_member_join(self, member: discord.Member) -> None:
+        if not member.bot:
+            self.sync.member_joined(member.guild.id, member.id)
+
+    @Cog.listener("on_raw_member_remove")
+    async def sync_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
+        if not payload.user.bot:
+            self.sync.member_left(payload.guild_id, payload.user.id)
+
     @Cog.listener("on_app_command_error")
     async def on_app_command_error_log(
         self, itr: ExultInteraction, error: app_commands.AppCommandError
@@ -61,7 +115,11 @@ class BotEvents(Cog):
         try:
             await func(error_msg, ephemeral=True)
         except:
-            self.bot.logger.critical(f"[APP_COMMAND_ERROR] {error}")
+            self.bot.logger.critical(
+                f"[APP_COMMAND_ERROR] {error}",
+                guild_id=itr.guild_id,
+                command=itr.command.qualified_name if itr.command else None,
+            )
 
     @commands.Cog.listener("on_error")
     async def on_error_log(self) -> None:
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+import datetime
+from typing import List, Optional, TYPE_CHECKING
+
+# Local Imports
+from helpers.logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("GuildSweeper",)
+
+
+class GuildSweeper:
+    """
+    Deletes the data of guilds we left more than `RETENTION` ago.
+
+    Leaving a guild stamps its `Guild.expires`, rejoining clears it again. Every
+    `interval` seconds the sweeper deletes expired guilds `batch_size` at a time,
+    letting their relations (members included) cascade, and sleeps `batch_delay`
+    seconds between batches so a large backlog doesn't monopolise the database.
+
+    Every cluster runs a sweeper that only deletes the guilds on its own shards,
+    as those are the only guilds it can tell whether we are back in.
+    """
+
+    # How long the data of a guild we left is kept, in case we are added back
+    RETENTION = datetime.timedelta(days=30)
+
+    _task: Optional[asyncio.Task[None]]
+
+    def __init__(
+        self,
+        bot: ExultBot,
+        *,
+        interval: float = 3600.0,
+        batch_size: int = 25,
+        batch_delay: float = 1.0,
+    ) -> None:
+        self.bot = bot
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.logger = Logger("GuildSweeper")
+        self._task = None
+
+    @classmethod
+    def expiry(cls) -> datetime.datetime:
+        """When the data of a guild we leave now should expire"""
+        return datetime.datetime.now(datetime.timezone.utc) + cls.RETENTION
+
+    async def mark_removed(self, guild_ids: List[int]) -> None:
+        """Stamps the expiry of guilds we have left, unless they already have one"""
+
+        if guild_ids:
+            await self.bot.db.guild.update_many(
+                where={"guild_id": {"in": guild_ids}, "expires": None},
+                data={"expires": self.expiry()},
+            )
+
+    async def mark_rejoined(self, guild_ids: List[int]) -> None:
+        """Clears the expiry of guilds we are back in"""
+
+        if guild_ids:
+            await self.bot.db.guild.update_many(
+                where={"guild_id": {"in": guild_ids}, "expires": {"not": None}},
+                data={"expires": None},
+            )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def sweep(self) -> int:
+        """Deletes the expired guilds of this cluster, returns how many were deleted"""
+
+        deleted = 0
+        after = 0
+        while True:
+            # Paged by guild ID, as the guilds of other clusters are left in place
+            now = datetime.datetime.now(datetime.timezone.utc)
+            expired = await self.bot.db.guild.find_many(
+                where={"expires": {"lt": now}, "guild_id": {"gt": after}},
+                take=self.batch_size,
+                order={"guild_id": "asc"},
+            )
+            if not expired:
+                return deleted
+            after = expired[-1].guild_id
+
+            owned = [g.guild_id for g in expired if self.bot.owns_guild(g.guild_id)]
+            if not owned:
+                continue
+
+            # We may have been added back without the expiry being cleared yet
+            rejoined = [g for g in owned if self.bot.get_guild(g)]
+            await self.mark_rejoined(rejoined)
+
+            guild_ids = [g for g in owned if g not in rejoined]
+            if guild_ids:
+                deleted += await self.bot.db.guild.delete_many(
+                    where={"guild_id": {"in": guild_ids}, "expires": {"lt": now}}
+                )
+            await asyncio.sleep(self.batch_delay)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            try:
+                deleted = await self.sweep()
+                if deleted:
+                    self.logger.info(f"Deleted {deleted} expired guilds.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Failed to sweep expired guilds: {type(e)}: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+import datetime
+import time
+from typing import List, Set, Tuple, TYPE_CHECKING
+
+# Third Party Packages
+import discord
+
+# Local Imports
+from helpers.logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+    from .expiry import GuildSweeper
+    from .registration import MemberRegistrar
+
+__all__ = ("Reconciler",)
+
+
+class Reconciler:
+    """
+    Brings the `Guild` and `Member` tables in line with our cache after a restart.
+
+    Guilds we joined while offline are inserted, and the expiry of those we left
+    while offline is stamped (or cleared for those we are back in). For every guild,
+    the cached member IDs are diffed against the `Member` table and only the
+    differences are inserted or deleted. The members of guilds we left are kept
+    until the guild expires, the same as when we leave a guild while online.
+
+    Guilds are reconciled one at a time in ascending ID order, sleeping `delay`
+    seconds between each so the event loop and database are never monopolised.
+    The highest guild ID reconciled is checkpointed to the `Reconciliation` table
+    every `CHECKPOINT_INTERVAL` guilds, so an interrupted run carries on from there
+    on the next start rather than starting over.
+    """
+
+    # Guilds reconciled between each checkpoint
+    CHECKPOINT_INTERVAL = 25
+
+    def __init__(
+        self,
+        bot: ExultBot,
+        registrar: MemberRegistrar,
+        sweeper: GuildSweeper,
+        *,
+        delay: float = 0.05,
+        page_size: int = 10_000,
+    ) -> None:
+        self.bot = bot
+        self.registrar = registrar
+        self.sweeper = sweeper
+        self.delay = delay
+        self.page_size = page_size
+        self.logger = Logger("Reconciler")
+
+    @property
+    def key(self) -> str:
+        """Identifies this cluster's progress in the `Reconciliation` table"""
+
+        if self.bot.cluster_id is None:
+            return "default"
+        return f"cluster-{self.bot.cluster_id}"
+
+    async def _db_guild_ids(self) -> Set[int]:
+        rows = await self.bot.db.query_raw("SELECT `guild_id` FROM `Guild`")
+        return {int(row["guild_id"]) for row in rows}
+
+    async def _db_member_ids(self, guild_id: int) -> Set[int]:
+        """Returns the registered member IDs of a guild, read a page at a time"""
+
+        member_ids: Set[int] = set()
+        after = 0
+        while True:
+            rows = await self.bot.db.query_raw(
+                "SELECT `member_id` FROM `Member` "
+                "WHERE `guild_id` = ? AND `member_id` > ? "
+                "ORDER BY `member_id` LIMIT ?",
+                guild_id,
+                after,
+                self.page_size,
+            )
+            page = [int(row["member_id"]) for row in rows]
+            member_ids.update(page)
+            if len(page) < self.page_size:
+                return member_ids
+            after = page[-1]
+            await asyncio.sleep(0)
+
+    async def reconcile_guild(self, guild: discord.Guild) -> Tuple[int, int]:
+        """Applies the member differences of one guild, returns (inserted, deleted)"""
+
+        cached = {m.id for m in guild.members if not m.bot}
+        registered = await self._db_member_ids(guild.id)
+
+        inserts = sorted(cached - registered)
+        for chunk in discord.utils.as_chunks(inserts, self.registrar.chunk_size):
+            await self.registrar.insert_members(guild.id, chunk)
+        deletes = sorted(registered - cached)
+        await self.registrar.delete_members(guild.id, deletes)
+        return len(inserts), len(deletes)
+
+    async def _checkpoint(self, cursor: int, *, finished: bool = False) -> None:
+        await self.bot.db.reconciliation.update(
+            where={"key": self.key},
+            data={
+                "cursor": cursor,
+                "finished_at": datetime.datetime.now(datetime.timezone.utc)
+                if finished
+                else None,
+            },
+        )
+
+    async def run(self) -> None:
+        """Reconciles every guild owned by this cluster"""
+
+        state = await self.bot.db.reconciliation.find_unique(where={"key": self.key})
+        cursor = state.cursor if state and state.finished_at is None else 0
+        await self.bot.db.reconciliation.upsert(
+            where={"key": self.key},
+            data={
+                "create": {"key": self.key, "cursor": cursor},
+                "update": {"cursor": cursor, "finished_at": None},
+            },
+        )
+        if cursor:
+            self.logger.info(f"Resuming interrupted reconciliation after guild {cursor}.")
+
+        start = time.monotonic()
+        db_guild_ids = await self._db_guild_ids()
+        cached = {g.id: g for g in self.bot.guilds if self.bot.owns_guild(g.id)}
+
+        chunk_size = self.registrar.chunk_size
+
+        # Guilds joined while we were offline
+        new_guild_ids = sorted(cached.keys() - db_guild_ids)
+        for chunk in discord.utils.as_chunks(new_guild_ids, chunk_size):
+            await self.bot.db.guild.create_many(
+                [{"guild_id": g} for g in chunk], skip_duplicates=True
+            )
+
+        # Guilds left while we were offline, their data (members included) is left for
+        # the sweeper once it expires
+        departed = {g for g in db_guild_ids - cached.keys() if self.bot.owns_guild(g)}
+        for chunk in discord.utils.as_chunks(sorted(departed), chunk_size):
+            await self.sweeper.mark_removed(chunk)
+        for chunk in discord.utils.as_chunks(sorted(cached), chunk_size):
+            await self.sweeper.mark_rejoined(chunk)
+
+        inserted = deleted = skipped = 0
+        pending = 0
+        for guild_id in sorted(cached):
+            if guild_id <= cursor:
+                continue
+
+            guild = cached[guild_id]
+            if guild.unavailable or not guild.chunked:
+                # Without every member cached we'd delete members that are still there
+                skipped += 1
+            else:
+                added, removed = await self.reconcile_guild(guild)
+                inserted += added
+                deleted += removed
+
+            cursor = guild_id
+            pending += 1
+            if pending >= self.CHECKPOINT_INTERVAL:
+                await self._checkpoint(cursor)
+                pending = 0
+            await asyncio.sleep(self.delay)
+
+        await self._checkpoint(cursor, finished=True)
+        self.logger.info(
+            f"Reconciled {len(cached)} guilds in {time.monotonic() - start:.1f}s: "
+            f"{len(new_guild_ids)} new guilds, {len(departed)} departed guilds, "
+            f"{inserted} members inserted, {deleted} members deleted, "
+            f"{skipped} guilds skipped as their members weren't cached."
+        )
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+import time
+from typing import List, Sequence, Set, TYPE_CHECKING
+
+# Third Party Packages
+import discord
+
+# Local Imports
+from helpers.logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("MemberRegistrar",)
+
+
+class MemberRegistrar:
+    """
+    Writes guilds and their members to the `Guild`, `User` and `Member` tables.
+
+    Members are written `chunk_size` at a time, each chunk in its own transaction,
+    so a large guild never turns into one huge statement. Members that are already
+    registered are looked up per chunk and skipped. At most `concurrency` guilds are
+    registered at once and each chunk waits for the previous one to be written, so
+    a wave of guild joins can't pile up writes faster than the database takes them.
+    """
+
+    def __init__(
+        self, bot: ExultBot, *, chunk_size: int = 1000, concurrency: int = 2
+    ) -> None:
+        self.bot = bot
+        self.chunk_size = chunk_size
+        self.logger = Logger("MemberRegistrar")
+        self._limiter = asyncio.Semaphore(concurrency)
+
+    async def registered_member_ids(
+        self, guild_id: int, member_ids: Sequence[int]
+    ) -> Set[int]:
+        """Returns which of the given members are already registered in the guild"""
+
+        if not member_ids:
+            return set()
+        placeholders = ", ".join("?" for _ in member_ids)
+        rows = await self.bot.db.query_raw(
+            "SELECT `member_id` FROM `Member` "
+            f"WHERE `guild_id` = ? AND `member_id` IN ({placeholders})",
+            guild_id,
+            *member_ids,
+        )
+        return {int(row["member_id"]) for row in rows}
+
+    async def insert_members(self, guild_id: int, member_ids: Sequence[int]) -> None:
+        """Registers the given members, and their users, in a single transaction"""
+
+        if not member_ids:
+            return
+        async with self.bot.db.batch_() as batcher:
+            batcher.user.create_many(
+                [{"user_id": m} for m in member_ids], skip_duplicates=True
+            )
+            batcher.member.create_many(
+                [{"guild_id": guild_id, "member_id": m} for m in member_ids],
+                skip_duplicates=True,
+            )
+
+    async def delete_members(self, guild_id: int, member_ids: Sequence[int]) -> None:
+        """Removes the given members from the guild, `chunk_size` at a time"""
+
+        for chunk in discord.utils.as_chunks(member_ids, self.chunk_size):
+            await self.bot.db.member.delete_many(
+                where={"guild_id": guild_id, "member_id": {"in": chunk}}
+            )
+
+    async def register_guild(self, guild: discord.Guild) -> int:
+        """Registers the guild and every member of it, returns how many were new"""
+
+        async with self._limiter:
+            # Guilds are only chunked for us at startup and on join when chunking is
+            # enabled, otherwise we would only register the members we happen to cache
+            if not guild.chunked and self.bot.intents.members:
+                await guild.chunk()
+
+            # Clears the expiry in case we are rejoining a guild we had left
+            await self.bot.db.guild.upsert(
+                {"guild_id": guild.id},
+                {"create": {"guild_id": guild.id}, "update": {"expires": None}},
+            )
+
+            member_ids = [m.id for m in guild.members if not m.bot]
+            chunks = (len(member_ids) + self.chunk_size - 1) // self.chunk_size
+            if chunks > 1:
+                self.logger.info(
+                    f"Registering {len(member_ids)} members in {chunks} chunks.",
+                    guild_id=guild.id,
+                )
+
+            start = time.monotonic()
+            inserted = 0
+            chunked = discord.utils.as_chunks(member_ids, self.chunk_size)
+            for i, chunk in enumerate(chunked):
+                registered = await self.registered_member_ids(guild.id, chunk)
+                new: List[int] = [m for m in chunk if m not in registered]
+                await self.insert_members(guild.id, new)
+                inserted += len(new)
+
+                if chunks > 1 and (i + 1) % 10 == 0:
+                    self.logger.info(
+                        f"Registered {i + 1}/{chunks} chunks ({inserted} new members).",
+                        guild_id=guild.id,
+                    )
+                # Give the event loop a turn between chunks
+                await asyncio.sleep(0)
+
+            if chunks > 1:
+                self.logger.info(
+                    f"Registered {len(member_ids)} members ({inserted} new) "
+                    f"in {time.monotonic() - start:.1f}s.",
+                    guild_id=guild.id,
+                )
+            return inserted
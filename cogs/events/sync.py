@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+from typing import Dict, Optional, Set, TYPE_CHECKING
+
+# Local Imports
+from helpers.logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from .registration import MemberRegistrar
+
+__all__ = ("MemberSync",)
+
+
+class MemberSync:
+    """
+    Keeps the `Member` table up to date from member join and leave events.
+
+    Joins and leaves are buffered per guild and written every `interval` seconds
+    as one batch of inserts and one batch of deletes per guild. Only a member's
+    latest event within an interval is written, so someone who rejoins a few times
+    in quick succession still costs a single row change.
+    """
+
+    _joined: Dict[int, Set[int]]
+    _left: Dict[int, Set[int]]
+    _task: Optional[asyncio.Task[None]]
+
+    def __init__(self, registrar: MemberRegistrar, *, interval: float = 5.0) -> None:
+        self.registrar = registrar
+        self.interval = interval
+        self.logger = Logger("MemberSync")
+
+        # Guild ID -> IDs of members waiting to be inserted / deleted
+        self._joined = {}
+        self._left = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    @property
+    def pending(self) -> int:
+        """The number of joins and leaves waiting to be written"""
+
+        joined = sum(len(m) for m in self._joined.values())
+        return joined + sum(len(m) for m in self._left.values())
+
+    def member_joined(self, guild_id: int, member_id: int) -> None:
+        left = self._left.get(guild_id)
+        if left is not None:
+            left.discard(member_id)
+        self._joined.setdefault(guild_id, set()).add(member_id)
+
+    def member_left(self, guild_id: int, member_id: int) -> None:
+        joined = self._joined.get(guild_id)
+        if joined is not None:
+            joined.discard(member_id)
+        self._left.setdefault(guild_id, set()).add(member_id)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stops the flush loop and writes anything still buffered"""
+
+        # Let the loop finish its current flush rather than cancelling it mid-write,
+        # which would lose the buffers it had already taken
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Writes every buffered join and leave to the database"""
+
+        async with self._flush_lock:
+            joined, self._joined = self._joined, {}
+            left, self._left = self._left, {}
+
+            for guild_id, member_ids in joined.items():
+                try:
+                    await self.registrar.insert_members(guild_id, sorted(member_ids))
+                except Exception as e:
+                    self.logger.error(f"Failed to insert members: {e}", guild_id=guild_id)
+                    for member_id in member_ids:
+                        if member_id not in self._left.get(guild_id, ()):
+                            self.member_joined(guild_id, member_id)
+
+            for guild_id, member_ids in left.items():
+                try:
+                    await self.registrar.delete_members(guild_id, sorted(member_ids))
+                except Exception as e:
+                    self.logger.error(f"Failed to delete members: {e}", guild_id=guild_id)
+                    for member_id in member_ids:
+                        if member_id not in self._joined.get(guild_id, ()):
+                            self.member_left(guild_id, member_id)
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
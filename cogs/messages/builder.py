@@ -10,7 +10,6 @@ from discord import app_commands
 # Local Imports
 from helpers.cog import Cog
 from .embeds import MessageManagerEmbed
-from .views import MessageManager
 
 # Type Imports
 if TYPE_CHECKING:
@@ -32,8 +31,10 @@ class MessageBuilder(Cog):
     )
     async def message_manager(self, itr: ExultInteraction) -> None:
         assert itr.guild
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        # The builder views are a large module, so they are only imported once the
+        # message manager is first used rather than when the cog is loaded
+        from .views import MessageManager
+
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = MessageManager(itr, messages=messages)
         await itr.response.send_message(embed=MessageManagerEmbed, view=view)
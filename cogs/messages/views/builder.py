@@ -14,21 +14,28 @@ from typing import (
     TYPE_CHECKING,
     Union,
 )
-from uuid import uuid4
 
 # Third Party Imports
 import discord
-from prisma.models import Message
+from prisma.errors import UniqueViolationError
 
 # Local Imports
 from helpers import ui
 from helpers.checks import is_image_valid
 from helpers.colour import Colours
 from helpers.embed import Embed, EmbedField
+from helpers.ids import generate_ulid
 from ..embeds import MessageBuilderEmbed, MessageManagerEmbed, SuccessEmbed
 
 # Type Imports
 if TYPE_CHECKING:
+    from prisma.types import (
+        EmbedAuthorCreateWithoutRelationsInput,
+        EmbedFieldCreateWithoutRelationsInput,
+        EmbedFooterCreateWithoutRelationsInput,
+    )
+
+    from helpers.messages import SavedMessage
     from helpers.types import ExultInteraction
     from ..types import MessageBuilderData
 
@@ -36,6 +43,7 @@ __all__ = ("MessageManager",)
 
 EFB = TypeVar("EFB", bound="EmbedFieldBuilder")
 CURRENT_MESSAGES = 2
+SAVE_ATTEMPTS = 3
 
 
 class ViewFactory:
@@ -46,21 +54,21 @@ class ViewFactory:
 
     @staticmethod
     def create_manager_view(
-        ctx: ExultInteraction, messages: List[Message]
+        ctx: ExultInteraction, messages: List[SavedMessage]
     ) -> MessageManager:
         return MessageManager(ctx, messages=messages)
 
     @staticmethod
     def create_builder_view(
         ctx: ExultInteraction,
-        messages: List[Message],
+        messages: List[SavedMessage],
         data: Optional[MessageBuilderData] = None,
     ) -> MessageBuilderView:
         return MessageBuilderView(ctx, data, messages=messages)
 
     @staticmethod
     def create_embed_manager_view(
-        ctx: ExultInteraction, data: MessageBuilderData, *, messages: List[Message]
+        ctx: ExultInteraction, data: MessageBuilderData, *, messages: List[SavedMessage]
     ) -> EmbedManagerView:
         return EmbedManagerView(ctx, data, messages=messages)
 
@@ -70,7 +78,7 @@ class ViewFactory:
         data: MessageBuilderData,
         *,
         delete: bool = False,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> EmbedSelectorView:
         return EmbedSelectorView(ctx, data, delete=delete, messages=messages)
 
@@ -80,7 +88,7 @@ class ViewFactory:
         data: MessageBuilderData,
         embed_data: Optional[Embed] = None,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> EmbedBuilderView:
         return EmbedBuilderView(ctx, data, embed_data, messages=messages)
 
@@ -126,7 +134,7 @@ class ViewFactory:
         data: MessageBuilderData,
         embed_data: Embed,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> EmbedFields:
         return EmbedFields(ctx, data, embed_data, messages=messages)
 
@@ -151,7 +159,7 @@ class ViewFactory:
         *,
         new: bool,
         pre_edit_state: Optional[EmbedField] = None,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> EmbedFieldBuilder:
         return EmbedFieldBuilder(
             ctx,
@@ -170,7 +178,7 @@ class ViewFactory:
         embed_data: Embed,
         *,
         delete: bool = False,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> EmbedFieldSelectorView:
         return EmbedFieldSelectorView(
             ctx, data, embed_data, delete=delete, messages=messages
@@ -215,13 +223,13 @@ class ViewFactory:
 
     @staticmethod
     def create_selector_view(
-        ctx: ExultInteraction, *, messages: List[Message], delete: bool = False
+        ctx: ExultInteraction, *, messages: List[SavedMessage], delete: bool = False
     ) -> MessageSelectorView:
         return MessageSelectorView(ctx, messages=messages, delete=delete)
 
     @staticmethod
     def create_send_view(
-        ctx: ExultInteraction, data: MessageBuilderData, *, messages: List[Message]
+        ctx: ExultInteraction, data: MessageBuilderData, *, messages: List[SavedMessage]
     ) -> SendMessageView:
         return SendMessageView(ctx, data, messages=messages)
 
@@ -231,7 +239,7 @@ class ViewFactory:
         data: MessageBuilderData,
         view: ui.View,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> MessageContentModal:
         return MessageContentModal(ctx, data, view, messages=messages)
 
@@ -254,7 +262,7 @@ class MessageContentModal(ui.Modal):
         data: MessageBuilderData,
         view: ui.View,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         self.ctx = ctx
         self.data = data
@@ -279,9 +287,7 @@ class MessageContentModal(ui.Modal):
         if new_content == self.data["content"]:
             return await itr.followup.send("No changes were made.", ephemeral=True)
         self.data["content"] = new_content
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = MessageBuilderView(self.ctx, self.data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -391,9 +397,7 @@ class EmbedAuthorModal(ui.Modal):
         self.embed_data.set_author(
             name=author_name, icon_url=author_icon, url=author_url
         )
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -468,9 +472,7 @@ class EmbedTitleModal(ui.Modal):
         )
         self.embed_data.title = title
         self.embed_data.url = title_url
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -520,9 +522,7 @@ class EmbedDescriptionModal(ui.Modal):
             colour=Colours.green,
         )
         self.embed_data.description = description
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -591,9 +591,7 @@ class EmbedColourModal(ui.Modal):
             description=f"## Updated Embed Colour: \n{colour_changes}",
             colour=colour,
         )
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -649,9 +647,7 @@ class EmbedFieldPropModal(ui.Modal):
             value=new_prop if self.edit == "value" else self.field.value,
             inline=self.field.inline,
         )
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedFieldBuilder(
             self.ctx,
             self.data,
@@ -703,9 +699,7 @@ class EmbedFieldInlineToggle(ui.Button[EFB]):
             value=self.field.value,
             inline=new_inline,
         )
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedFieldBuilder(
             self.ctx,
             self.data,
@@ -751,9 +745,7 @@ class EmbedFieldConfirm(ui.Button[EFB]):
         await itr.response.defer(ephemeral=True)
 
         action = "created" if not self.view.new else "updated"
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         embed = Embed(
             description=f"## Embed Field {action}:\n Field {len(self.embed_data.fields)} has been {action}!",
@@ -777,7 +769,7 @@ class EmbedFieldBuilder(ui.View):
         *,
         new: bool,
         pre_edit_state: Optional[EmbedField] = None,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         self.new = new
         self.pre_edit_state = pre_edit_state
@@ -854,9 +846,7 @@ class EmbedFieldSelector(ui.Select[ui.V]):
         assert itr.guild
         await itr.response.defer(ephemeral=True)
 
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         if self.delete:
             total = 0
             for pos in sorted([int(v) for v in self.values], reverse=True):
@@ -896,7 +886,7 @@ class EmbedFieldSelectorView(ui.View):
         embed_data: Embed,
         *,
         delete: bool = False,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         super().__init__(ctx, personal=True)
 
@@ -921,7 +911,7 @@ class EmbedFields(ui.View):
         data: MessageBuilderData,
         embed_data: Embed,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         super().__init__(ctx, personal=True)
 
@@ -1049,9 +1039,7 @@ class EmbedFooterModal(ui.Modal):
             )
 
             self.embed_data.set_footer(text=footer_text, icon_url=footer_icon)
-            messages = await itr.client.db.message.find_many(
-                where={"guild_id": itr.guild.id}
-            )
+            messages = await itr.client.message_index.get(itr.guild.id)
             view = EmbedBuilderView(
                 self.ctx, self.data, self.embed_data, messages=messages
             )
@@ -1104,9 +1092,7 @@ class EmbedThumbnailModal(ui.Modal):
         )
 
         self.embed_data.set_thumbnail(url=thumbnail_url)
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -1157,9 +1143,7 @@ class EmbedImageModal(ui.Modal):
         )
 
         self.embed_data.set_image(url=image_url)
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = EmbedBuilderView(self.ctx, self.data, self.embed_data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -1173,7 +1157,7 @@ class EmbedBuilderConfirm(ui.Button[ui.V]):
         data: MessageBuilderData,
         embed_data: Embed,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         self.ctx = ctx
         self.data = data
@@ -1213,7 +1197,7 @@ class EmbedBuilderView(ui.View):
         data: MessageBuilderData,
         embed_data: Optional[Embed] = None,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         super().__init__(ctx, personal=True)
 
@@ -1340,9 +1324,7 @@ class EmbedSelector(ui.Select[ui.V]):
         assert itr.guild
         await itr.response.defer(ephemeral=True)
 
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         if self.delete:
             total = 0
             for pos in sorted([int(v) for v in self.values], reverse=True):
@@ -1371,7 +1353,7 @@ class EmbedSelectorView(ui.View):
         data: MessageBuilderData,
         *,
         delete: bool = False,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         super().__init__(ctx, personal=True)
 
@@ -1391,7 +1373,10 @@ class EmbedSelectorView(ui.View):
 
 class EmbedManagerView(ui.View):
     def __init__(
-        self, ctx: ExultInteraction, data: MessageBuilderData, messages: List[Message]
+        self,
+        ctx: ExultInteraction,
+        data: MessageBuilderData,
+        messages: List[SavedMessage],
     ) -> None:
         super().__init__(ctx, personal=True)
 
@@ -1496,10 +1481,9 @@ class JSONEditorModal(ui.Modal):
                 )
             _embed: Dict[str, Any] = user_json["embed"]
             try:
-                embed = await Embed.from_user_dict(itr.client, _embed)
+                embeds = await Embed.from_user_dicts(itr.client, [_embed])
             except Exception as e:
                 return await itr.followup.send(str(e), ephemeral=True)
-            embeds.append(embed)
         elif "embeds" in user_json:
             if not isinstance(user_json["embeds"], Sequence):
                 return await itr.followup.send(
@@ -1513,19 +1497,15 @@ class JSONEditorModal(ui.Modal):
                         f"Embed {pos} must be a dictionary representing a valid discord Embed.",
                         ephemeral=True,
                     )
-                _embed_data: Dict[str, Any] = _embed_item
-                try:
-                    embed = await Embed.from_user_dict(itr.client, _embed_data)
-                except Exception as e:
-                    return await itr.followup.send(
-                        f"Embed `{pos}`: {e}", ephemeral=True
-                    )
-                embeds.append(embed)
+            _embed_data: List[Dict[str, Any]] = list(_embeds)
+            try:
+                # Validates every embed at once so all errors are reported together
+                embeds = await Embed.from_user_dicts(itr.client, _embed_data)
+            except Exception as e:
+                return await itr.followup.send(str(e)[:2000], ephemeral=True)
         self.data["content"] = user_json.get("content", None)
         self.data["embeds"] = embeds
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
+        messages = await itr.client.message_index.get(itr.guild.id)
         view = MessageBuilderView(self.ctx, self.data, messages=messages)
         await itr.edit_original_response(view=view)
         self.view.edited = True
@@ -1588,7 +1568,10 @@ class SendMessageSelect(ui.ChannelSelect[ui.V]):
 
 class SendMessageView(ui.View):
     def __init__(
-        self, ctx: ExultInteraction, data: MessageBuilderData, messages: List[Message]
+        self,
+        ctx: ExultInteraction,
+        data: MessageBuilderData,
+        messages: List[SavedMessage],
     ) -> None:
         super().__init__(ctx, personal=True)
 
@@ -1637,75 +1620,113 @@ class MessageNameModal(ui.Modal):
         )
         return bool(message_exists)
 
-    async def is_id_valid(self, itr: ExultInteraction, embed_id: str) -> bool:
-        assert itr.guild
-        embed_exists = await itr.client.db.embed.find_unique(where={"id": embed_id})
-        return bool(embed_exists)
+    async def save_message(self, itr: ExultInteraction, name: str) -> None:
+        """
+        Saves the message along with all of its embeds, authors, footers and fields.
 
-    async def generate_embed_id(self, itr: ExultInteraction) -> str:
-        assert itr.guild
-        embed_id = str(uuid4())
-        while await self.is_id_valid(itr, embed_id):
-            embed_id = str(uuid4())
-        return embed_id
+        Embed IDs are time-ordered ULIDs generated client-side, so the primary key on
+        `Embed.id` is our only collision check. Should it ever be hit, the save is
+        simply retried with fresh IDs. Any other unique violation is raised straight
+        away, as new IDs can't fix it.
+        """
 
-    async def generate_embeds(
-        self, itr: ExultInteraction, embeds: List[Embed], message_name: str
+        for attempt in range(1, SAVE_ATTEMPTS + 1):
+            embed_ids = [generate_ulid() for _ in self.data["embeds"]]
+            try:
+                return await self.write_message(itr, name, embed_ids)
+            except UniqueViolationError:
+                # The batch is rolled back, so any of our IDs that exist now were
+                # already taken. Otherwise, e.g. the name was taken since we checked it
+                if attempt == SAVE_ATTEMPTS or not await self.embed_ids_taken(
+                    itr, embed_ids
+                ):
+                    raise
+
+    async def embed_ids_taken(
+        self, itr: ExultInteraction, embed_ids: List[str]
+    ) -> bool:
+        if not embed_ids:
+            return False
+        taken = await itr.client.db.embed.count(where={"id": {"in": embed_ids}})
+        return taken > 0
+
+    async def write_message(
+        self, itr: ExultInteraction, name: str, embed_ids: List[str]
     ) -> None:
+        """
+        Writes the message along with all of its embeds, authors, footers and fields
+        in a single batched transaction.
+
+        Embed IDs are passed in so that fields can reference their embed without us
+        having to create the embed first to learn its ID.
+        """
         assert itr.guild
 
-        await itr.client.db.embedauthor.create_many(
-            [
-                {
-                    "guild_id": itr.guild.id,
-                    "message_name": message_name,
-                    "author_name": ea.name,
-                    "author_icon": ea.icon_url,
-                    "author_url": ea.url,
-                }
-                for ea in [e.author for e in embeds]
-                if ea.name
-            ]
-        )
-        await itr.client.db.embedfooter.create_many(
-            [
-                {
-                    "guild_id": itr.guild.id,
-                    "message_name": message_name,
-                    "footer_text": ef.text,
-                    "footer_icon": ef.icon_url,
-                }
-                for ef in [e.footer for e in embeds]
-                if ef.text
-            ]
-        )
-        for e in embeds:
-            new_embed = await itr.client.db.embed.create(
+        embeds = self.data["embeds"]
+        authors: List[EmbedAuthorCreateWithoutRelationsInput] = [
+            {
+                "embed_id": embed_id,
+                "author_name": e.author.name,
+                "author_icon": e.author.icon_url,
+                "author_url": e.author.url,
+            }
+            for embed_id, e in zip(embed_ids, embeds)
+            if e.author.name
+        ]
+        footers: List[EmbedFooterCreateWithoutRelationsInput] = [
+            {
+                "embed_id": embed_id,
+                "footer_text": e.footer.text,
+                "footer_icon": e.footer.icon_url,
+            }
+            for embed_id, e in zip(embed_ids, embeds)
+            if e.footer.text
+        ]
+        fields: List[EmbedFieldCreateWithoutRelationsInput] = [
+            {
+                "field_index": pos,
+                "embed_id": embed_id,
+                "field_name": f.name,
+                "field_value": f.value,
+                "field_inline": f.inline,
+            }
+            for embed_id, e in zip(embed_ids, embeds)
+            for pos, f in enumerate(e.fields)
+            if f.name and f.value
+        ]
+
+        async with itr.client.db.batch_() as batcher:
+            batcher.message.create(
                 {
                     "guild_id": itr.guild.id,
-                    "name": message_name,
-                    "title": e.title,
-                    "description": e.description,
-                    "colour": e.colour.value if e.colour else None,
-                    "timestamp": e.timestamp,
-                    "thumbnail": e.thumbnail.url,
-                    "image": e.image.url,
-                    "url": e.url,
+                    "user_id": itr.user.id,
+                    "name": name,
+                    "content": self.data["content"] or "",
                 }
             )
-            await itr.client.db.embedfield.create_many(
-                [
+            for embed_id, e in zip(embed_ids, embeds):
+                batcher.embed.create(
                     {
-                        "field_index": pos,
-                        "embed_id": new_embed.id,
-                        "field_name": f.name,
-                        "field_value": f.value,
-                        "field_inline": f.inline,
+                        "id": embed_id,
+                        "guild_id": itr.guild.id,
+                        "name": name,
+                        "title": e.title,
+                        "description": e.description,
+                        "colour": e.colour.value if e.colour else None,
+                        "timestamp": e.timestamp,
+                        "thumbnail": e.thumbnail.url,
+                        "image": e.image.url,
+                        "url": e.url,
                     }
-                    for pos, f in enumerate(e.fields)
-                    if f.name and f.value
-                ]
-            )
+                )
+            if authors:
+                batcher.embedauthor.create_many(authors)
+            if footers:
+                batcher.embedfooter.create_many(footers)
+            if fields:
+                batcher.embedfield.create_many(fields)
+
+        itr.client.message_index.add(itr.guild.id, name)
 
     async def on_submit(self, itr: ExultInteraction) -> None:
         try:
@@ -1715,21 +1736,11 @@ class MessageNameModal(ui.Modal):
             name = self.children[0].value
             if not await self.is_name_valid(itr, name):
                 if self.data["edit"] == None:
-                    await self.generate_embeds(itr, self.data["embeds"], name)
-                    await itr.client.db.message.create(
-                        {
-                            "guild_id": itr.guild.id,
-                            "user_id": itr.user.id,
-                            "name": name,
-                            "content": self.data["content"] or "",
-                        }
-                    )
+                    await self.save_message(itr, name)
                     msg = "Message has been created!"
                 else:
                     msg = "Message has been updated!"
-                messages = await itr.client.db.message.find_many(
-                    where={"guild_id": itr.guild.id}
-                )
+                messages = await itr.client.message_index.get(itr.guild.id)
                 view = (
                     SendMessageView(self.ctx, self.data, messages=messages)
                     if self.send_after
@@ -1751,7 +1762,7 @@ class MessageBuilderView(ui.View):
         ctx: ExultInteraction,
         data: Optional[MessageBuilderData] = None,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
     ) -> None:
         try:
             super().__init__(ctx, personal=True)
@@ -1855,7 +1866,11 @@ class MessageBuilderView(ui.View):
 
 class MessageSelector(ui.Select[ui.V]):
     def __init__(
-        self, ctx: ExultInteraction, *, messages: List[Message], delete: bool = False
+        self,
+        ctx: ExultInteraction,
+        *,
+        messages: List[SavedMessage],
+        delete: bool = False,
     ) -> None:
         self.ctx = ctx
         self.delete = delete
@@ -1870,15 +1885,13 @@ class MessageSelector(ui.Select[ui.V]):
         assert itr.guild
         await itr.response.defer(ephemeral=True)
 
-        messages = await itr.client.db.message.find_many(
-            where={"guild_id": itr.guild.id}
-        )
         if self.delete:
             total = 0
             for name in self.values:
                 await itr.client.db.message.delete(
                     where={"guild_id_name": {"guild_id": itr.guild.id, "name": name}}
                 )
+                itr.client.message_index.remove(itr.guild.id, name)
                 total += 1
             description = f"Successfully deleted {total}/{len(self.values)} messages."
             embed = Embed(
@@ -1886,8 +1899,10 @@ class MessageSelector(ui.Select[ui.V]):
                 colour=Colours.green,
             )
             await itr.followup.send(embed=embed, ephemeral=True)
+            messages = await itr.client.message_index.get(itr.guild.id)
             view = MessageManager(self.ctx, messages=messages)
         else:
+            messages = await itr.client.message_index.get(itr.guild.id)
             name = self.values[0]
             message = await itr.client.db.message.find_unique(
                 where={"guild_id_name": {"guild_id": itr.guild.id, "name": name}},
@@ -1911,7 +1926,7 @@ class MessageSelectorView(ui.View):
         self,
         ctx: ExultInteraction,
         *,
-        messages: List[Message],
+        messages: List[SavedMessage],
         delete: bool = False,
     ) -> None:
         super().__init__(ctx, personal=True)
@@ -1931,7 +1946,7 @@ class MessageSelectorView(ui.View):
 
 
 class MessageManager(ui.View):
-    def __init__(self, ctx: ExultInteraction, *, messages: List[Message]) -> None:
+    def __init__(self, ctx: ExultInteraction, *, messages: List[SavedMessage]) -> None:
         super().__init__(ctx, personal=True)
 
         buttons: List[Dict[str, Any]] = [
@@ -5,17 +5,19 @@ from typing import TYPE_CHECKING
 
 # Local Imports
 from .emojis import Emojis
+from .role import RoleUtility
 
 # Type Imports
 if TYPE_CHECKING:
     from bot import ExultBot
 
 
-class Miscellaneous(Emojis):
+class Miscellaneous(Emojis, RoleUtility):
     """
     Miscellaneous Cog - Contains everything regarding:
 
     - Emoji creation, deletion and stealing
+    - Role management, including bulk role jobs
     """
 
 
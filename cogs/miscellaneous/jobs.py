@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+import datetime
+import time
+from typing import Any, Dict, Iterator, List, Literal, Optional, TYPE_CHECKING
+
+# Third Party Packages
+import discord
+from prisma.enums import RoleJobAction, RoleJobStatus
+
+# Local Imports
+from helpers.colour import Colours
+from helpers.embed import Embed
+from helpers.logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("RoleJob", "filter_members")
+
+
+def filter_members(
+    guild: discord.Guild,
+    role: discord.Role,
+    *,
+    action: Literal["add", "remove"],
+    with_role: Optional[discord.Role] = None,
+    without_role: Optional[discord.Role] = None,
+    include_bots: bool = True,
+    after: int = 0,
+) -> List[int]:
+    """
+    Returns the IDs of every member that a bulk role job needs to touch, in ascending order.
+
+    Role membership is resolved once into sets of member IDs so that each member
+    is checked with a few set lookups rather than scanning their role list.
+    Members that already have (or already lack) the target role are skipped, as are
+    members with an ID at or below `after` when resuming a job from its cursor.
+    """
+
+    has_role = {m.id for m in role.members}
+    with_ids = {m.id for m in with_role.members} if with_role else None
+    without_ids = {m.id for m in without_role.members} if without_role else set()
+    adding = action == "add"
+
+    member_ids: List[int] = []
+    for member in guild.members:
+        if member.id <= after:
+            continue
+        if member.bot and not include_bots:
+            continue
+        if (member.id in has_role) == adding:
+            continue
+        if with_ids is not None and member.id not in with_ids:
+            continue
+        if member.id in without_ids:
+            continue
+        member_ids.append(member.id)
+    return sorted(member_ids)
+
+
+class RoleJob:
+    """
+    A bulk role assignment / removal running in the background.
+
+    Requests are issued by a small pool of workers and paced by discord.py's HTTP
+    client, which tracks each rate limit bucket from the `X-RateLimit-Remaining`
+    and `X-RateLimit-Reset-After` headers and waits out the bucket when it runs dry.
+    Progress, along with an ETA based on the throughput observed so far, is written
+    to the job's progress message every `PROGRESS_INTERVAL` seconds.
+
+    Members are processed in ascending ID order and the job is checkpointed to the
+    `RoleJob` table every `CHECKPOINT_SIZE` members, storing the highest member ID
+    processed as a cursor so the job can be resumed after a restart.
+    """
+
+    # Seconds between edits of the progress message
+    PROGRESS_INTERVAL = 15.0
+
+    # Members processed between each checkpoint of the job to the database
+    CHECKPOINT_SIZE = 50
+
+    id: Optional[str]
+    member_ids: List[int]
+
+    def __init__(
+        self,
+        bot: ExultBot,
+        guild: discord.Guild,
+        role: discord.Role,
+        member_ids: List[int],
+        *,
+        action: Literal["add", "remove"],
+        channel_id: int,
+        message_id: int,
+        with_role_id: Optional[int] = None,
+        without_role_id: Optional[int] = None,
+        include_bots: bool = True,
+        concurrency: int = 3,
+        job_id: Optional[str] = None,
+        processed: int = 0,
+        failed: int = 0,
+    ) -> None:
+        self.id = job_id
+        self.bot = bot
+        self.guild = guild
+        self.role = role
+        self.member_ids = member_ids
+        self.action = action
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.with_role_id = with_role_id
+        self.without_role_id = without_role_id
+        self.include_bots = include_bots
+        self.concurrency = concurrency
+        self.logger = Logger("RoleJob")
+
+        # Resumed jobs carry over the progress made before the restart
+        self.processed = processed
+        self.failed = failed
+        self.total = processed + len(member_ids)
+        self.cursor = 0
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self._started_monotonic = time.monotonic()
+        self._initial_processed = processed
+        self._checkpointed = (processed, failed)
+        self._cancelled = asyncio.Event()
+        self._suspended = False
+
+    @property
+    def succeeded(self) -> int:
+        return self.processed - self.failed
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stops the job after any in-flight requests have finished"""
+        self._cancelled.set()
+
+    def suspend(self) -> None:
+        """Stops the job like :meth:`cancel`, but leaves it to be resumed on the next start"""
+        self._suspended = True
+        self._cancelled.set()
+
+    def throughput(self) -> Optional[float]:
+        """The observed number of members processed per second, if known yet"""
+
+        elapsed = time.monotonic() - self._started_monotonic
+        processed = self.processed - self._initial_processed
+        if not processed or elapsed <= 0:
+            return None
+        return processed / elapsed
+
+    def eta(self) -> Optional[datetime.datetime]:
+        """Estimated time of completion based on the observed throughput"""
+
+        rate = self.throughput()
+        if rate is None:
+            return None
+        remaining = self.total - self.processed
+        return discord.utils.utcnow() + datetime.timedelta(seconds=remaining / rate)
+
+    def build_embed(self, *, finished: bool = False) -> Embed:
+        """Builds the progress embed for the current state of the job"""
+
+        if self.action == "add":
+            verb, past, preposition = "Assigning", "Assigned", "to"
+        else:
+            verb, past, preposition = "Removing", "Removed", "from"
+
+        if finished and self.cancelled:
+            heading = f"## Cancelled after {self.processed}/{self.total} members"
+            colour = Colours.red
+        elif finished:
+            heading = f"## {past} {self.role.mention} {preposition} {self.succeeded} members"
+            colour = Colours.green
+        else:
+            heading = f"## {verb} {self.role.mention} {preposition} {self.total} members"
+            colour = Colours.gold
+
+        lines = [heading, f"Progress: {self.processed}/{self.total} ({self.failed} failed)"]
+        if finished:
+            lines.append(f"Started: {discord.utils.format_dt(self.started, 'R')}")
+        else:
+            eta = self.eta()
+            formatted_eta = discord.utils.format_dt(eta, "R") if eta else "Calculating..."
+            lines.append(f"Estimated time of completion: {formatted_eta}")
+        lines.append("## Options")
+
+        embed = Embed(description="\n".join(lines), colour=colour)
+        embed.add_field(
+            name="Include Bots", value="Yes" if self.include_bots else "No", inline=False
+        )
+        if self.with_role_id:
+            embed.add_field(
+                name="With Role", value=f"<@&{self.with_role_id}>", inline=False
+            )
+        if self.without_role_id:
+            embed.add_field(
+                name="Without Role", value=f"<@&{self.without_role_id}>", inline=False
+            )
+        return embed
+
+    async def update_progress(self, *, finished: bool = False) -> None:
+        """
+        Edits the progress message.
+
+        This goes through the channel rather than the interaction so that it keeps
+        working after the interaction token has expired.
+        """
+
+        message = self.bot.get_partial_messageable(
+            self.channel_id, guild_id=self.guild.id
+        ).get_partial_message(self.message_id)
+        try:
+            await message.edit(embed=self.build_embed(finished=finished))
+        except discord.HTTPException as e:
+            self.logger.warn(
+                f"Failed to update progress for role job {self.id}: {e}",
+                guild_id=self.guild.id,
+            )
+
+    async def _apply(self, member_id: int) -> None:
+        member = self.guild.get_member(member_id)
+        if member is None:
+            # The member left after the job was created, nothing to do
+            return
+        reason = "Bulk role job"
+        if self.action == "add":
+            await member.add_roles(self.role, reason=reason)
+        else:
+            await member.remove_roles(self.role, reason=reason)
+
+    async def _worker(self, member_ids: Iterator[int]) -> None:
+        # Every worker pulls from the same iterator, so each member is handled once
+        for member_id in member_ids:
+            if self.cancelled:
+                return
+            try:
+                await self._apply(member_id)
+            except discord.HTTPException:
+                self.failed += 1
+            self.processed += 1
+
+    async def _report_progress(self) -> None:
+        while True:
+            await asyncio.sleep(self.PROGRESS_INTERVAL)
+            await self.update_progress()
+
+    async def create_record(self) -> None:
+        """Stores the job in the database so that it can be resumed"""
+
+        record = await self.bot.db.rolejob.create(
+            {
+                "guild_id": self.guild.id,
+                "role_id": self.role.id,
+                "action": RoleJobAction(self.action),
+                "with_role_id": self.with_role_id,
+                "without_role_id": self.without_role_id,
+                "include_bots": self.include_bots,
+                "channel_id": self.channel_id,
+                "message_id": self.message_id,
+            }
+        )
+        self.id = record.id
+
+    async def checkpoint(self, *, status: Optional[RoleJobStatus] = None) -> None:
+        """Saves the job's cursor, and optionally its status, to the database"""
+
+        if self.id is None:
+            return
+        processed, failed = self._checkpointed
+        data: Dict[str, Any] = {
+            "cursor": self.cursor,
+            "processed": processed,
+            "failed": failed,
+        }
+        if status is not None:
+            data["status"] = status
+        try:
+            await self.bot.db.rolejob.update(where={"id": self.id}, data=data)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to checkpoint role job {self.id}: {e}", guild_id=self.guild.id
+            )
+
+    async def run(self) -> None:
+        """Processes every member in the job, then posts the final summary"""
+
+        if self.id is None:
+            await self.create_record()
+
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            for i in range(0, len(self.member_ids), self.CHECKPOINT_SIZE):
+                chunk = self.member_ids[i : i + self.CHECKPOINT_SIZE]
+                member_ids = iter(chunk)
+                await asyncio.gather(
+                    *(self._worker(member_ids) for _ in range(self.concurrency))
+                )
+                if self.cancelled:
+                    # The chunk may be partially processed, keep the last cursor
+                    break
+                self.cursor = chunk[-1]
+                self._checkpointed = (self.processed, self.failed)
+                await self.checkpoint()
+        except asyncio.CancelledError:
+            # The bot is shutting down, leave the job to be resumed
+            self._suspended = True
+            raise
+        finally:
+            reporter.cancel()
+            if self._suspended:
+                await self.checkpoint()
+            else:
+                self._checkpointed = (self.processed, self.failed)
+                status = (
+                    RoleJobStatus.cancelled if self.cancelled else RoleJobStatus.finished
+                )
+                await self.checkpoint(status=status)
+                await self.update_progress(finished=True)
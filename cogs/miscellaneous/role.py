@@ -1,22 +1,142 @@
 from __future__ import annotations
 
 import asyncio
-import datetime
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Literal, Optional, Set, TYPE_CHECKING
 
 import discord
 from discord import app_commands
+from prisma.enums import RoleJobAction, RoleJobStatus
 
 from helpers.checks import check_role_permissions
 from helpers.cog import Cog
-from helpers.colour import Colours
-from helpers.embed import Embed
+from .jobs import RoleJob, filter_members
 
 if TYPE_CHECKING:
+    from prisma.models import RoleJob as DBRoleJob
+
+    from bot import ExultBot
     from helpers.types import ExultInteraction
 
 
 class RoleUtility(Cog):
+    jobs: Dict[int, RoleJob]
+    job_tasks: Set[asyncio.Task[None]]
+
+    def __init__(self, bot: ExultBot) -> None:
+        super().__init__(bot)
+        # Guild ID -> the bulk role job currently running in that guild
+        self.jobs = {}
+        self.job_tasks = set()
+        self._jobs_resumed = False
+
+    async def cog_unload(self) -> None:
+        # Suspend rather than cancel so that the jobs resume on our next start. This
+        # runs from `ExultBot.close` whilst the database is still connected, so each
+        # job checkpoints its cursor before we exit.
+        suspended = len(self.jobs)
+        for job in self.jobs.values():
+            job.suspend()
+        if self.job_tasks:
+            _, pending = await asyncio.wait(self.job_tasks, timeout=30)
+            # Jobs still stuck on a request are cancelled, which checkpoints them too
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            self.logger.info(f"Suspended {suspended} role jobs.")
+
+    def run_job(self, job: RoleJob) -> None:
+        """Runs a bulk role job in the background"""
+
+        self.jobs[job.guild.id] = job
+        task = asyncio.create_task(job.run())
+        self.job_tasks.add(task)
+
+        def on_done(task: asyncio.Task[None]) -> None:
+            self.job_tasks.discard(task)
+            self.jobs.pop(job.guild.id, None)
+
+        task.add_done_callback(on_done)
+
+    async def resume_job(self, record: DBRoleJob) -> None:
+        """Recreates an unfinished job from its database record and resumes it"""
+
+        guild = self.bot.get_guild(record.guild_id)
+        role = guild.get_role(record.role_id) if guild else None
+        with_role = (
+            guild.get_role(record.with_role_id)
+            if guild and record.with_role_id
+            else None
+        )
+        without_role = (
+            guild.get_role(record.without_role_id)
+            if guild and record.without_role_id
+            else None
+        )
+        if not guild or not role or (record.with_role_id and not with_role):
+            # Nothing left that this job could apply to
+            await self.bot.db.rolejob.update(
+                where={"id": record.id}, data={"status": RoleJobStatus.cancelled}
+            )
+            return
+
+        if not guild.chunked:
+            await guild.chunk()
+
+        action: Literal["add", "remove"] = (
+            "add" if record.action == RoleJobAction.add else "remove"
+        )
+        member_ids = filter_members(
+            guild,
+            role,
+            action=action,
+            with_role=with_role,
+            without_role=without_role,
+            include_bots=record.include_bots,
+            after=record.cursor,
+        )
+        job = RoleJob(
+            self.bot,
+            guild,
+            role,
+            member_ids,
+            action=action,
+            channel_id=record.channel_id,
+            message_id=record.message_id,
+            with_role_id=record.with_role_id,
+            without_role_id=record.without_role_id,
+            include_bots=record.include_bots,
+            job_id=record.id,
+            processed=record.processed,
+            failed=record.failed,
+        )
+        job.cursor = record.cursor
+        self.logger.info(
+            f"Resuming role job {record.id} in guild {guild.id} "
+            f"with {len(member_ids)} members remaining."
+        )
+        self.run_job(job)
+
+    @Cog.listener("on_ready")
+    async def resume_jobs(self) -> None:
+        """Resumes any bulk role jobs that were interrupted by a restart"""
+
+        if self._jobs_resumed:
+            return
+        self._jobs_resumed = True
+
+        records = await self.bot.db.rolejob.find_many(
+            where={"status": RoleJobStatus.running}
+        )
+        for record in records:
+            if record.guild_id in self.jobs or not self.bot.owns_guild(record.guild_id):
+                # Either already running, or it belongs to another cluster
+                continue
+            try:
+                await self.resume_job(record)
+            except Exception as e:
+                self.logger.error(f"Failed to resume role job {record.id}: {e}")
+
     role_group = app_commands.Group(
         name="role",
         description="Commands for managing roles",
@@ -84,80 +204,80 @@ class RoleUtility(Cog):
                 ephemeral=True,
             )
 
-    @role_all.command(name="add", description="Adds a role to all members")
-    async def role_all_add(
+    async def start_role_job(
         self,
         itr: ExultInteraction,
         role: discord.Role,
-        with_role: Optional[discord.Role] = None,
-        without_role: Optional[discord.Role] = None,
-        include_bots: bool = True,
+        *,
+        action: Literal["add", "remove"],
+        with_role: Optional[discord.Role],
+        without_role: Optional[discord.Role],
+        include_bots: bool,
     ) -> None:
-        assert itr.guild and isinstance(itr.user, discord.Member)
+        assert itr.guild and itr.channel_id
 
         if not await check_role_permissions(itr.guild, role, itr=itr):
             return
+        if itr.guild.id in self.jobs:
+            await itr.response.send_message(
+                "A bulk role job is already running in this server! "
+                "Use `/role all cancel` to stop it.",
+                ephemeral=True,
+            )
+            return
 
-        members = (
-            itr.guild.members
-            if include_bots
-            else [m for m in itr.guild.members if not m.bot]
-        )
-        if with_role and without_role:
-            members = [
-                m
-                for m in members
-                if with_role in m.roles and not without_role in m.roles
-            ]
-        elif with_role and not without_role:
-            members = [m for m in members if with_role not in m.roles]
-        elif not with_role and without_role:
-            members = [m for m in members if without_role in m.roles]
-
-        started = datetime.datetime.now(datetime.timezone.utc)
-        eta = started + datetime.timedelta(seconds=len(members) * 3)
-        formatted_started = discord.utils.format_dt(started, "R")
-        formatted_eta = discord.utils.format_dt(eta, "R")
-
-        embed = Embed(
-            description=(
-                f"## Assigning {role.mention} to {len(members)} members\n"
-                f"Estimated time of completion: {formatted_eta}\n"
-                "## Options"
-            ),
-            colour=Colours.gold,
-        )
-        embed.add_field(
-            name="Include Bots", value="Yes" if include_bots else "No", inline=False
+        await itr.response.defer()
+        # Guilds aren't chunked at startup unless another cog needs it
+        if not itr.guild.chunked:
+            await itr.guild.chunk()
+
+        member_ids = filter_members(
+            itr.guild,
+            role,
+            action=action,
+            with_role=with_role,
+            without_role=without_role,
+            include_bots=include_bots,
         )
-        if with_role:
-            embed.add_field(
-                name="With Role",
-                value=with_role.mention if with_role else "No role required",
-                inline=False,
+        if not member_ids:
+            await itr.edit_original_response(
+                content="No members matched the given options!"
             )
-        if without_role:
-            embed.add_field(
-                name="Without Role",
-                value=without_role.mention if without_role else "No role required",
-                inline=False,
-            )
-        await itr.followup.send(embed=embed)
-        failed = 0
-        for member in members:
-            try:
-                if role not in member.roles:
-                    await member.add_roles(role)
-                    await asyncio.sleep(3)
-            except:
-                failed += 1
-        success = len(members) - failed
-        embed.description = (
-            f"## Assigned {role.mention} to {success} members\n"
-            f"Estimated time of completion: {formatted_started}"
+            return
+
+        message = await itr.original_response()
+        job = RoleJob(
+            self.bot,
+            itr.guild,
+            role,
+            member_ids,
+            action=action,
+            channel_id=itr.channel_id,
+            message_id=message.id,
+            with_role_id=with_role.id if with_role else None,
+            without_role_id=without_role.id if without_role else None,
+            include_bots=include_bots,
+        )
+        await itr.edit_original_response(embed=job.build_embed())
+        self.run_job(job)
+
+    @role_all.command(name="add", description="Adds a role to all members")
+    async def role_all_add(
+        self,
+        itr: ExultInteraction,
+        role: discord.Role,
+        with_role: Optional[discord.Role] = None,
+        without_role: Optional[discord.Role] = None,
+        include_bots: bool = True,
+    ) -> None:
+        await self.start_role_job(
+            itr,
+            role,
+            action="add",
+            with_role=with_role,
+            without_role=without_role,
+            include_bots=include_bots,
         )
-        embed.colour = Colours.green
-        await itr.edit_original_response(embed=embed)
 
     @role_all.command(name="remove", description="Removes a role from all members")
     async def role_all_remove(
@@ -168,68 +288,31 @@ class RoleUtility(Cog):
         without_role: Optional[discord.Role] = None,
         include_bots: bool = True,
     ) -> None:
-        assert itr.guild and isinstance(itr.user, discord.Member)
+        await self.start_role_job(
+            itr,
+            role,
+            action="remove",
+            with_role=with_role,
+            without_role=without_role,
+            include_bots=include_bots,
+        )
 
-        if not await check_role_permissions(itr.guild, role, itr=itr):
-            return
+    @role_all.command(
+        name="cancel", description="Cancels the bulk role job running in this server"
+    )
+    async def role_all_cancel(self, itr: ExultInteraction) -> None:
+        assert itr.guild
 
-        members = (
-            itr.guild.members
-            if include_bots
-            else [m for m in itr.guild.members if not m.bot]
-        )
-        if with_role and without_role:
-            members = [
-                m
-                for m in members
-                if with_role in m.roles and not without_role in m.roles
-            ]
-        elif with_role and not without_role:
-            members = [m for m in members if with_role not in m.roles]
-        elif not with_role and without_role:
-            members = [m for m in members if without_role in m.roles]
-
-        started = datetime.datetime.now(datetime.timezone.utc)
-        eta = started + datetime.timedelta(seconds=len(members) * 3)
-        formatted_started = discord.utils.format_dt(started, "R")
-        formatted_eta = discord.utils.format_dt(eta, "R")
-
-        embed = Embed(
-            description=(
-                f"## Removing {role.mention} from {len(members)} members\n"
-                f"Estimated time of completion: {formatted_eta}\n"
-                "## Options"
-            ),
-            colour=Colours.gold,
-        )
-        embed.add_field(
-            name="Include Bots", value="Yes" if include_bots else "No", inline=False
-        )
-        if with_role:
-            embed.add_field(
-                name="With Role",
-                value=with_role.mention if with_role else "No role required",
-                inline=False,
-            )
-        if without_role:
-            embed.add_field(
-                name="Without Role",
-                value=without_role.mention if without_role else "No role required",
-                inline=False,
+        job = self.jobs.get(itr.guild.id)
+        if not job:
+            await itr.response.send_message(
+                "There is no bulk role job running in this server!", ephemeral=True
             )
-        await itr.followup.send(embed=embed)
-        failed = 0
-        for member in members:
-            try:
-                if role in member.roles:
-                    await member.remove_roles(role)
-                    await asyncio.sleep(3)
-            except:
-                failed += 1
-        success = len(members) - failed
-        embed.description = (
-            f"## Removed {role.mention} from {success} members\n"
-            f"Estimated time of completion: {formatted_started}"
+            return
+
+        job.cancel()
+        await itr.response.send_message(
+            f"Cancelling the bulk role job for {job.role.mention} "
+            f"after {job.processed}/{job.total} members.",
+            ephemeral=True,
         )
-        embed.colour = Colours.green
-        await itr.edit_original_response(embed=embed)
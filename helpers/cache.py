@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+import time
+from collections import OrderedDict
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+__all__ = ("SingleFlight", "TTLCache")
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    A bounded, least-recently-used cache whose entries expire after `ttl` seconds.
+
+    Keeps track of hits and misses so that the effectiveness of a cache can be
+    inspected at runtime.
+    """
+
+    _data: OrderedDict[K, Tuple[float, V]]
+
+    def __init__(self, *, maxsize: int = 1024, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that were served from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _lookup(self, key: K) -> Optional[Tuple[float, V]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Returns the cached value for `key`, or `default` if it is missing or expired"""
+
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def peek(self, key: K) -> Optional[V]:
+        """
+        Returns the cached value for `key` without counting it as a hit or miss,
+        or refreshing its recency. Used when updating an entry in place.
+        """
+
+        entry = self._lookup(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key: K, value: V, *, ttl: Optional[float] = None) -> None:
+        """Caches `value` under `key`, evicting the least recently used entry if full"""
+
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Removes `key` from the cache if it is present"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache"""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Returns a snapshot of the cache's size and hit/miss counters"""
+
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    De-duplicates concurrent work for the same key.
+
+    While a call for a key is in flight, any other callers asking for the same key
+    wait on that call's result instead of starting their own.
+    """
+
+    _inflight: Dict[K, asyncio.Future[V]]
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._inflight = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        """Returns the result of `factory()`, sharing it with concurrent callers of `key`"""
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        else:
+            self.coalesced += 1
+        # Shielded so that one caller being cancelled doesn't cancel it for the others
+        return await asyncio.shield(future)
+
+    def _done(self, key: K, future: asyncio.Future[V]) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            future.exception()
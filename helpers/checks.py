@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 # Core Imports
-from typing import Optional, TYPE_CHECKING
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple, TYPE_CHECKING, Union
 
 # Third Party Packages
+import aiohttp
 import discord
 
+# Local Imports
+from .cache import SingleFlight, TTLCache
+
 # Type Imports
 if TYPE_CHECKING:
     from bot import ExultBot
@@ -22,19 +27,100 @@ VALID_IMAGE_CONTENT_TYPES = (
 )
 
 
-async def is_image_valid(bot: ExultBot, url: str) -> bool:
-    """
-    Checks to see if the provided URL is a valid direct image URL
-    """
+# Results of our image checks, URL -> (is valid, content type), shared by the whole bot.
+# Invalid URLs are cached for less time in case they get fixed, while timeouts, network
+# errors and server errors aren't cached at all as they say nothing about the URL.
+IMAGE_CACHE: TTLCache[str, Tuple[bool, Optional[str]]] = TTLCache(
+    maxsize=4096, ttl=3600.0
+)
+IMAGE_INVALID_TTL = 300.0
+_image_requests: SingleFlight[str, Tuple[bool, Optional[str]]] = SingleFlight()
+
 
+async def _head_image(
+    bot: ExultBot, url: str, timeout: float
+) -> Tuple[bool, Optional[str]]:
     try:
         # Performs a HTTP head request to the given URL
-        async with bot.session.head(url) as r:
+        async with bot.session.head(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as r:
+            status = r.status
             content = r.headers.get("content-type")
-            return content in VALID_IMAGE_CONTENT_TYPES
-    except:
-        pass
-    return False
+    except aiohttp.InvalidURL:
+        IMAGE_CACHE.set(url, (False, None), ttl=IMAGE_INVALID_TTL)
+        return False, None
+    except asyncio.TimeoutError:
+        return False, None
+    except aiohttp.ClientError:
+        return False, None
+
+    # Rate limits and server errors may well pass on a retry
+    if status == 429 or status >= 500:
+        return False, content
+
+    result = (status < 400 and content in VALID_IMAGE_CONTENT_TYPES, content)
+    IMAGE_CACHE.set(url, result, ttl=None if result[0] else IMAGE_INVALID_TTL)
+    return result
+
+
+async def get_image_info(
+    bot: ExultBot, url: str, *, timeout: float = 5.0
+) -> Tuple[bool, Optional[str]]:
+    """
+    Returns whether the provided URL is a valid direct image URL, along with its content type.
+
+    Results are cached, and concurrent checks of the same URL share a single request.
+    """
+
+    cached = IMAGE_CACHE.get(url)
+    if cached is not None:
+        return cached
+    return await _image_requests.run(url, lambda: _head_image(bot, url, timeout))
+
+
+async def is_image_valid(bot: ExultBot, url: str, *, timeout: float = 5.0) -> bool:
+    """
+    Checks to see if the provided URL is a valid direct image URL
+    """
+
+    valid, _ = await get_image_info(bot, url, timeout=timeout)
+    return valid
+
+
+def image_cache_stats() -> Dict[str, Union[int, float]]:
+    """Returns the hit rate and size of our image check cache"""
+
+    return {
+        **IMAGE_CACHE.stats(),
+        "in_flight": len(_image_requests),
+        "coalesced": _image_requests.coalesced,
+    }
+
+
+async def validate_image_urls(
+    bot: ExultBot,
+    urls: Iterable[str],
+    *,
+    concurrency: int = 8,
+    timeout: float = 5.0,
+) -> Dict[str, bool]:
+    """
+    Checks many image URLs at once, returning whether each one is a valid direct image URL.
+
+    Duplicate URLs are only checked once, and at most `concurrency` requests are in
+    flight at any time, each giving up after `timeout` seconds.
+    """
+
+    unique_urls = list(dict.fromkeys(urls))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(url: str) -> bool:
+        async with semaphore:
+            return await is_image_valid(bot, url, timeout=timeout)
+
+    results = await asyncio.gather(*(check(url) for url in unique_urls))
+    return dict(zip(unique_urls, results))
 
 
 async def check_role_permissions(
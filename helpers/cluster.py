@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+# Core Imports
+import multiprocessing
+import os
+import platform
+import signal
+import time
+from types import FrameType
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Third Party Packages
+import aiohttp
+
+# Local Imports
+from .logger import Logger, LogLevel
+
+__all__ = (
+    "ClusterConfig",
+    "ClusterSupervisor",
+    "fetch_recommended_shards",
+    "split_shards",
+)
+
+
+class ClusterConfig(NamedTuple):
+    """Everything a cluster process needs to start its bot, must be picklable"""
+
+    cluster_id: Optional[int]
+    shard_ids: Optional[Tuple[int, ...]]
+    shard_count: Optional[int]
+    ipc: bool
+    ipc_port: int
+    # Cluster ID -> IPC port of every other cluster
+    ipc_peers: Dict[int, int]
+    sync: bool
+    guilds: Tuple[int, ...]
+    member_cache: Optional[bool]
+    chunk_guilds: Optional[bool]
+    log_level: LogLevel
+    log_json: bool
+
+
+def split_shards(shard_count: int, clusters: int) -> List[Tuple[int, ...]]:
+    """Splits the shard IDs into `clusters` contiguous ranges of (almost) equal size"""
+
+    per_cluster, remainder = divmod(shard_count, clusters)
+    ranges: List[Tuple[int, ...]] = []
+    start = 0
+    for i in range(clusters):
+        end = start + per_cluster + (1 if i < remainder else 0)
+        ranges.append(tuple(range(start, end)))
+        start = end
+    return ranges
+
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Returns the number of shards that Discord recommends for our bot"""
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"},
+        ) as r:
+            r.raise_for_status()
+            data = await r.json()
+    return data["shards"]
+
+
+class ClusterSupervisor:
+    """
+    Runs each cluster in its own process and restarts any that crash.
+
+    A cluster that exits cleanly is left stopped. One that crashes is restarted
+    after a back-off that doubles with each consecutive crash, up to `max_backoff`
+    seconds, and resets once the cluster has stayed up for `stable_after` seconds.
+    """
+
+    _crashes: Dict[int, int]
+    _processes: Dict[int, multiprocessing.process.BaseProcess]
+    _restart_at: Dict[int, float]
+    _started_at: Dict[int, float]
+
+    def __init__(
+        self,
+        target: Callable[[ClusterConfig], None],
+        configs: List[ClusterConfig],
+        *,
+        check_interval: float = 5.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        stable_after: float = 600.0,
+    ) -> None:
+        self.target = target
+        self.configs = {i: config for i, config in enumerate(configs)}
+        self.check_interval = check_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.logger = Logger("ClusterSupervisor", console=True)
+
+        # Spawned rather than forked so each cluster starts with a clean interpreter
+        self._context = multiprocessing.get_context("spawn")
+        self._crashes = {}
+        self._processes = {}
+        self._restart_at = {}
+        self._started_at = {}
+        self._stopping = False
+
+    def _start(self, cluster_id: int) -> None:
+        config = self.configs[cluster_id]
+        process = self._context.Process(
+            target=self.target, args=(config,), name=f"ExultBot-Cluster-{cluster_id}"
+        )
+        process.start()
+        self._processes[cluster_id] = process
+        self._started_at[cluster_id] = time.monotonic()
+        self.logger.info(
+            f"Started cluster {cluster_id} (pid {process.pid}) with shards "
+            f"{config.shard_ids} on IPC port {config.ipc_port}."
+        )
+
+    def _check(self, cluster_id: int) -> None:
+        now = time.monotonic()
+        process = self._processes.get(cluster_id)
+        if process is None:
+            if now >= self._restart_at.get(cluster_id, 0):
+                self._restart_at.pop(cluster_id, None)
+                self._start(cluster_id)
+            return
+        if process.is_alive():
+            if now - self._started_at[cluster_id] >= self.stable_after:
+                self._crashes.pop(cluster_id, None)
+            return
+
+        del self._processes[cluster_id]
+        if process.exitcode == 0:
+            self.logger.info(f"Cluster {cluster_id} shut down.")
+            self.configs.pop(cluster_id)
+            return
+
+        crashes = self._crashes.get(cluster_id, 0) + 1
+        self._crashes[cluster_id] = crashes
+        backoff = min(self.base_backoff * 2 ** (crashes - 1), self.max_backoff)
+        self._restart_at[cluster_id] = now + backoff
+        self.logger.error(
+            f"Cluster {cluster_id} exited with code {process.exitcode}, "
+            f"restarting in {backoff:.0f}s (crash #{crashes})."
+        )
+
+    def _handle_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        self._stopping = True
+
+    def stop(self, *, interrupt: bool = True, timeout: float = 60.0) -> None:
+        """
+        Asks every cluster to shut down, terminating any that don't in time.
+
+        `interrupt` should be False if the clusters have already been sent a Ctrl+C,
+        a second one would cut their graceful shutdown short.
+        """
+
+        self._stopping = True
+        for process in self._processes.values():
+            if not interrupt or not process.is_alive() or process.pid is None:
+                continue
+            if platform.system() == "Windows":
+                process.terminate()
+            else:
+                # SIGINT lets the bot close its connections like a Ctrl+C would
+                os.kill(process.pid, signal.SIGINT)
+
+        deadline = time.monotonic() + timeout
+        for cluster_id, process in self._processes.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                self.logger.warn(f"Cluster {cluster_id} did not shut down, terminating.")
+                process.terminate()
+                process.join()
+        self._processes.clear()
+
+    def run(self) -> None:
+        """Starts every cluster and supervises them until they stop or we are signalled"""
+
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        for cluster_id in self.configs:
+            self._start(cluster_id)
+
+        interrupt = True
+        try:
+            while self.configs and not self._stopping:
+                time.sleep(self.check_interval)
+                for cluster_id in list(self.configs):
+                    self._check(cluster_id)
+        except KeyboardInterrupt:
+            # The clusters share our process group and got the Ctrl+C too
+            interrupt = False
+        finally:
+            self.stop(interrupt=interrupt)
+            self.logger.info("All clusters stopped.")
@@ -17,14 +17,15 @@ from typing import (
 
 # Third Party Packages
 import discord
-from prisma.models import Embed as DBEmbed
 
 # Local Imports
-from helpers.checks import is_image_valid
+from helpers.checks import is_image_valid, validate_image_urls
 from helpers.colour import Colours
 
 # Type Imports
 if TYPE_CHECKING:
+    from prisma.models import Embed as DBEmbed
+
     from bot import ExultBot
 
 
@@ -168,12 +169,87 @@ class Embed(discord.Embed):
 
         return self
 
+    @staticmethod
+    def image_urls(data: Dict[str, Any]) -> List[str]:
+        """Returns the thumbnail, image, author icon and footer icon URLs in a user-provided :class:`dict`"""
+
+        urls: List[Any] = []
+        for key in ("thumbnail", "image"):
+            value = data.get(key)
+            urls.append(value.get("url") if isinstance(value, dict) else value)
+        for key in ("author", "footer"):
+            value = data.get(key)
+            if isinstance(value, dict):
+                urls.append(value.get("icon_url"))
+        return [url for url in urls if isinstance(url, str)]
+
+    @classmethod
+    async def from_user_dicts(
+        cls, bot: ExultBot, data: Sequence[Dict[str, Any]]
+    ) -> List[Self]:
+        """
+        Tries to convert many user-provided :class:`dict` objects to :class:`helpers.embed.Embed` objects.
+
+        Every image URL across all of the embeds is collected and checked concurrently
+        up front, then the errors from every embed are raised together as one
+        :class:`ValueError`.
+        """
+
+        urls = [
+            url
+            for embed_data in data
+            for url in cls.image_urls(embed_data)
+            if bot.regex.url_regex.search(url)
+        ]
+        valid_images = await validate_image_urls(bot, urls)
+
+        embeds: List[Self] = []
+        errors: List[str] = []
+        for pos, embed_data in enumerate(data):
+            try:
+                embed = await cls.from_user_dict(
+                    bot, embed_data, valid_images=valid_images
+                )
+            except (TypeError, ValueError) as e:
+                errors.append(f"Embed `{pos}`: {e}")
+                continue
+            embeds.append(embed)
+
+        if errors:
+            raise ValueError("\n".join(errors))
+        return embeds
+
     @classmethod
-    async def from_user_dict(cls, bot: ExultBot, data: Dict[str, Any]) -> Self:
-        """Tries to convert a user-provided :class:`dict` to a valid :class:`helpers.embed.Embed`"""
+    async def from_user_dict(
+        cls,
+        bot: ExultBot,
+        data: Dict[str, Any],
+        *,
+        valid_images: Optional[Dict[str, bool]] = None,
+    ) -> Self:
+        """
+        Tries to convert a user-provided :class:`dict` to a valid :class:`helpers.embed.Embed`
+
+        `valid_images` can be given the results of :func:`validate_image_urls` so that
+        image URLs that have already been checked are not requested again. Every invalid
+        image URL is reported at once.
+        """
 
         # we are bypassing __init__ here since it doesn't apply here
         self = cls.__new__(cls)
+        image_errors: List[str] = []
+
+        async def check_image(url: str, error: str) -> bool:
+            is_url = bot.regex.url_regex.search(url)
+            if is_url:
+                if valid_images is not None and url in valid_images:
+                    valid = valid_images[url]
+                else:
+                    valid = await is_image_valid(bot, url)
+                if valid:
+                    return True
+            image_errors.append(error)
+            return False
 
         if "color" in data:
             try:
@@ -187,7 +263,6 @@ class Embed(discord.Embed):
                 raise ValueError("Invalid value given for key: `color`")
         else:
             colour = Colours.embed_default
-        print("Colour success")
 
         if "timestamp" in data:
             try:
@@ -198,39 +273,28 @@ class Embed(discord.Embed):
                 )
         else:
             timestamp = None
-        print("timestamp success")
 
+        thumbnail = None
         if "thumbnail" in data:
             thumb_url = (
                 data["thumbnail"]
                 if isinstance(data["thumbnail"], str)
                 else data["thumbnail"]["url"]
             )
-            is_url = bot.regex.url_regex.search(thumb_url)
-            if not is_url:
-                raise ValueError("Embed thumbnail must be a direct image url.")
-            if not await is_image_valid(bot, thumb_url):
-                raise ValueError("Embed thumbnail must be a direct image url.")
-            thumbnail = thumb_url
-        else:
-            thumbnail = None
-        print("thumbnail success")
+            if await check_image(
+                thumb_url, "Embed thumbnail must be a direct image url."
+            ):
+                thumbnail = thumb_url
 
+        image = None
         if "image" in data:
             image_url = (
                 data["image"]
                 if isinstance(data["image"], str)
                 else data["image"]["url"]
             )
-            is_url = bot.regex.url_regex.search(image_url)
-            if not is_url:
-                raise ValueError("Embed image must be a direct image url.")
-            if not await is_image_valid(bot, image_url):
-                raise ValueError("Embed image must be a direct image url.")
-            image = image_url
-        else:
-            image = None
-        print("image success")
+            if await check_image(image_url, "Embed image must be a direct image url."):
+                image = image_url
 
         author: Dict[str, str] = {}
         if "author" in data:
@@ -242,22 +306,16 @@ class Embed(discord.Embed):
             else:
                 author["name"] = str(data["author"]["name"])
             if "icon_url" in data["author"]:
-                is_url = bot.regex.url_regex.search(data["author"]["icon_url"])
-                if not is_url:
-                    raise ValueError(
-                        "Embed Author icon url must be a direct image url."
-                    )
-                if not await is_image_valid(bot, data["author"]["icon_url"]):
-                    raise ValueError(
-                        "Embed Author icon url must be a direct image url."
-                    )
-                author["icon_url"] = data["author"]["icon_url"]
+                if await check_image(
+                    data["author"]["icon_url"],
+                    "Embed Author icon url must be a direct image url.",
+                ):
+                    author["icon_url"] = data["author"]["icon_url"]
             if "url" in data["author"]:
                 is_url = bot.regex.url_regex.search(data["author"]["url"])
                 if not is_url:
                     raise ValueError("Embed Author url must be a valid url.")
                 author["url"] = data["author"]["url"]
-        print("author success")
 
         footer: Dict[str, str] = {}
         if "footer" in data:
@@ -269,23 +327,19 @@ class Embed(discord.Embed):
             else:
                 footer["text"] = str(data["footer"]["text"])
             if "icon_url" in data["footer"]:
-                is_url = bot.regex.url_regex.search(data["footer"]["icon_url"])
-                if not is_url:
-                    raise ValueError(
-                        "Embed Footer icon url must be a direct image url."
-                    )
-                if not await is_image_valid(bot, data["footer"]["icon_url"]):
-                    raise ValueError(
-                        "Embed Footer icon url must be a direct image url."
-                    )
-                footer["icon_url"] = data["footer"]["icon_url"]
-        print("footer success")
+                if await check_image(
+                    data["footer"]["icon_url"],
+                    "Embed Footer icon url must be a direct image url.",
+                ):
+                    footer["icon_url"] = data["footer"]["icon_url"]
+
+        if image_errors:
+            raise ValueError("\n".join(image_errors))
 
         self.type = "rich"
         self.title = data.get("title", None)
         self.description = data.get("description", None)
         self.url = data.get("url", None)
-        print("main props success")
 
         if colour:
             self._colour = colour
@@ -295,7 +349,6 @@ class Embed(discord.Embed):
             self.set_thumbnail(url=thumbnail)
         if image:
             self.set_image(url=image)
-        print("other props success")
 
         if author:
             self.set_author(
@@ -303,10 +356,8 @@ class Embed(discord.Embed):
                 url=author.get("url", None),
                 icon_url=author.get("icon_url", None),
             )
-        print("set author success")
         if footer:
             self.set_footer(text=footer["text"], icon_url=footer.get("icon_url", None))
-        print("set footer success")
 
         if "fields" in data:
             required: Tuple[str, ...] = ("name", "value")
@@ -331,6 +382,5 @@ class Embed(discord.Embed):
                 if not isinstance(inline, bool):
                     raise TypeError(f"Field {pos} inline must be a boolean type.")
                 self.add_field(name=name, value=value, inline=inline)
-        print("fields success")
 
         return self
@@ -0,0 +1,69 @@
+"""Generation of unique, time-ordered identifiers"""
+
+# Core Imports
+import os
+import threading
+import time
+
+__all__ = ("ULIDGenerator", "generate_ulid")
+
+
+# Crockford's Base32 alphabet, sorts in the same order as the values it encodes
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# A ULID is 48 bits of millisecond timestamp followed by 80 bits of randomness
+RANDOM_BITS = 80
+ULID_LENGTH = 26
+
+
+class ULIDGenerator:
+    """
+    Generates ULIDs, 26 character identifiers that sort by the time they were created.
+
+    IDs created within the same millisecond increment the random component of the
+    previous ID rather than drawing new randomness, so IDs from a single generator
+    are strictly increasing. Being time-ordered, new IDs are appended to the end of
+    an index instead of being scattered across it like uuid4s are.
+    """
+
+    def __init__(self) -> None:
+        self._last_ms = 0
+        self._last_random = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(value: int) -> str:
+        """Encodes a 128 bit integer as a 26 character Crockford Base32 string"""
+
+        chars = [""] * ULID_LENGTH
+        for i in range(ULID_LENGTH - 1, -1, -1):
+            chars[i] = CROCKFORD_ALPHABET[value & 0x1F]
+            value >>= 5
+        return "".join(chars)
+
+    def generate(self) -> str:
+        """Returns a new ULID"""
+
+        with self._lock:
+            now = time.time_ns() // 1_000_000
+            if now <= self._last_ms:
+                # Same millisecond (or the clock went backwards), stay monotonic
+                now = self._last_ms
+                self._last_random += 1
+                if self._last_random >> RANDOM_BITS:
+                    # Exhausted this millisecond's random space, borrow the next one
+                    now += 1
+                    self._last_random = int.from_bytes(os.urandom(10), "big")
+            else:
+                self._last_random = int.from_bytes(os.urandom(10), "big")
+            self._last_ms = now
+            value = (now << RANDOM_BITS) | self._last_random
+        return self.encode(value)
+
+
+_generator = ULIDGenerator()
+
+
+def generate_ulid() -> str:
+    """Returns a new ULID from the shared generator"""
+    return _generator.generate()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+# Core Imports
+from typing import Callable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# Third Party Packages
+import discord
+
+__all__ = ("CachePolicy", "CogRequirements", "resolve_cache_policy")
+
+
+class CogRequirements(NamedTuple):
+    """
+    The gateway intents and caches that an extension needs to work.
+
+    Extensions declare these in `cogs.COG_REQUIREMENTS`.
+    """
+
+    intents: discord.Intents
+    reason: str
+    # Whether members are looked up from the cache, e.g. through `guild.get_member`
+    member_cache: bool = False
+    # Whether every member of every guild needs to be cached, e.g. through `guild.members`
+    chunk_guilds: bool = False
+    # Whether messages are looked up from the cache
+    message_cache: bool = False
+
+
+class CachePolicy(NamedTuple):
+    """The intents and cache settings that the bot is started with"""
+
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    chunk_guilds_at_startup: bool
+    max_messages: Optional[int]
+    # The requirements of the bot and of every extension, in load order
+    reasons: List[Tuple[str, CogRequirements]]
+
+    def report(self) -> str:
+        """Returns a readable summary of what was enabled and why"""
+
+        lines = ["Gateway intents and caches:"]
+        for name, requirements in self.reasons:
+            intents = [n for n, enabled in requirements.intents if enabled]
+            lines.append(
+                f"- {name}: {', '.join(intents) or 'no intents'} ({requirements.reason})"
+            )
+        member_cache = [n for n, enabled in self.member_cache_flags if enabled]
+        lines.append(
+            f"Member cache: {', '.join(member_cache) or 'disabled'}"
+            + self._requested_by(lambda r: r.member_cache or r.chunk_guilds)
+        )
+        lines.append(
+            f"Chunk guilds at startup: {'yes' if self.chunk_guilds_at_startup else 'no'}"
+            + self._requested_by(lambda r: r.chunk_guilds)
+        )
+        lines.append(
+            f"Message cache: {self.max_messages or 'disabled'}"
+            + self._requested_by(lambda r: r.message_cache)
+        )
+        return "\n".join(lines)
+
+    def _requested_by(self, predicate: Callable[[CogRequirements], bool]) -> str:
+        names = [name for name, requirements in self.reasons if predicate(requirements)]
+        return f" (requested by {', '.join(names)})" if names else ""
+
+
+def resolve_cache_policy(
+    extensions: Iterable[str],
+    requirements: Mapping[str, CogRequirements],
+    *,
+    extra: Mapping[str, CogRequirements] = {},
+    member_cache: Optional[bool] = None,
+    chunk_guilds: Optional[bool] = None,
+    max_messages: int = 1000,
+) -> CachePolicy:
+    """
+    Builds the bot's intents and cache settings from the `requirements` declared for
+    the given extensions, along with any `extra` requirements of the bot itself.
+
+    `member_cache` and `chunk_guilds` override what the extensions asked for when set.
+    Extensions that declare no requirements are assumed to need every intent. None of
+    the extensions are imported, so this can run before they are loaded.
+    """
+
+    reasons: List[Tuple[str, CogRequirements]] = list(extra.items())
+    for extension in extensions:
+        declared = requirements.get(extension)
+        if declared is None:
+            declared = CogRequirements(
+                discord.Intents.all(),
+                "No requirements declared",
+                member_cache=True,
+                chunk_guilds=True,
+                message_cache=True,
+            )
+        reasons.append((extension, declared))
+
+    intents = discord.Intents.none()
+    for _, requirements in reasons:
+        intents |= requirements.intents
+
+    if member_cache is None:
+        member_cache = any(r.member_cache or r.chunk_guilds for _, r in reasons)
+    if chunk_guilds is None:
+        chunk_guilds = any(r.chunk_guilds for _, r in reasons)
+
+    if member_cache:
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    else:
+        member_cache_flags = discord.MemberCacheFlags.none()
+
+    return CachePolicy(
+        intents=intents,
+        member_cache_flags=member_cache_flags,
+        # Chunking is pointless, and not possible, without the members intent and cache
+        chunk_guilds_at_startup=chunk_guilds and intents.members and member_cache,
+        max_messages=max_messages if any(r.message_cache for _, r in reasons) else None,
+        reasons=reasons,
+    )
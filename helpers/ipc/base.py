@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 # Core Imports
+import hashlib
 import inspect
+import json
 import platform
 from enum import Enum
 from types import TracebackType
@@ -23,6 +25,14 @@ from aiohttp import web
 # Local Imports
 from helpers.logger import Logger
 
+# orjson is considerably faster at serialising our payloads, but is optional
+try:
+    import orjson  # type: ignore
+except ModuleNotFoundError:
+    HAS_ORJSON = False
+else:
+    HAS_ORJSON = True
+
 # Type Imports
 if TYPE_CHECKING:
     from bot import ExultBot
@@ -31,6 +41,47 @@ if TYPE_CHECKING:
 FuncT = TypeVar("FuncT", bound="Callable[..., Any]")
 
 
+def dumps(obj: Any) -> bytes:
+    """Serialises the given object to compact JSON, using orjson if it is installed"""
+
+    if HAS_ORJSON:
+        return orjson.dumps(obj)  # type: ignore
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=True).encode()
+
+
+def json_response(obj: Any, *, status: int = 200) -> web.Response:
+    """Returns a JSON response serialised with :func:`dumps`"""
+    return web.Response(body=dumps(obj), status=status, content_type="application/json")
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    """Whether the request's `If-None-Match` header matches the given entity tag"""
+
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        # Weak comparison, as is specified for If-None-Match
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def conditional_response(request: web.Request, body: bytes) -> web.Response:
+    """
+    Returns a JSON response for the given body with an ETag, or an empty
+    `304 Not Modified` if the client already has this exact body.
+    """
+
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    # Clients may keep the response, but must check with us before reusing it
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
 class Route(NamedTuple):
     name: str
     method: str
@@ -74,8 +125,9 @@ class IPCBase:
     logger: Logger
     routes: List[Route]
 
-    def __init__(self, bot: ExultBot) -> None:
+    def __init__(self, bot: ExultBot, *, port: int = 3000) -> None:
         self.bot = bot
+        self.port = port
         self.logger = Logger("IPC")
         self.routes = []
 
@@ -105,9 +157,10 @@ class IPCBase:
     ) -> None:
         await self.close()
 
-    async def start(self, *, port: int = 3000) -> None:
-        """Starts our web app runner and webserver"""
+    async def start(self, *, port: Optional[int] = None) -> None:
+        """Starts our web app runner and webserver, on our configured port by default"""
 
+        port = port or self.port
         self.logger.debug("Starting IPC runner.")
         await self._runner.setup()
         self.logger.debug("Starting IPC webserver.")
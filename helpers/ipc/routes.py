@@ -1,48 +1,139 @@
 from __future__ import annotations
 
 # Core Imports
-from typing import TYPE_CHECKING
+import asyncio
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    cast,
+)
 
 # Third Party Packages
+import aiohttp
+import discord
 from aiohttp import web
 
 # Local Imports
-from .base import IPCBase, Methods, route
-from .types import MinimalDiscordGuild, MinimalDiscordUser
+from helpers.cache import SingleFlight, TTLCache
+from helpers.checks import image_cache_stats
+from .base import (
+    IPCBase,
+    Methods,
+    conditional_response,
+    dumps,
+    json_response,
+    route,
+)
+from .types import (
+    BotStats,
+    ClusterStats,
+    MinimalDiscordChannel,
+    MinimalDiscordGuild,
+    MinimalDiscordUser,
+)
 
 # Type Imports
 if TYPE_CHECKING:
     from discord import Guild, User
 
+    from bot import ExultBot
+
+
+def _guild_channels(guild: Guild) -> List[MinimalDiscordChannel]:
+    return [
+        {
+            "category": {"id": c.category.id, "name": c.category.name}
+            if c.category
+            else None,
+            "id": c.id,
+            "name": c.name,
+            "type": c.type.value,
+        }
+        for c in guild.channels
+    ]
+
+
+# How to get each field of a :class:`MinimalDiscordGuild`, so that we only build the
+# fields that were asked for
+GUILD_FIELDS: Dict[str, Callable[[Guild], Any]] = {
+    "channels": _guild_channels,
+    "emojis": lambda guild: [],
+    "icon": lambda guild: guild.icon.url if guild.icon else None,
+    "id": lambda guild: guild.id,
+    "name": lambda guild: guild.name,
+    "owner_id": lambda guild: guild.owner_id,
+    "premium_tier": lambda guild: guild.premium_tier,
+    "roles": lambda guild: [],
+    "unavailable": lambda guild: guild.unavailable,
+}
+
 
 class ExultBotIPC(IPCBase):
-    def _guild_to_dict(self, guild: Guild) -> MinimalDiscordGuild:
+    # Most users that can be requested from `/users/batch` at once
+    MAX_BATCH_SIZE = 200
+    # `/users/{id}/guilds` is streamed for users sharing more guilds than this
+    STREAM_THRESHOLD = 100
+    # Bytes read at a time from other clusters whilst streaming their guilds through
+    PIPE_CHUNK_SIZE = 64 * 1024
+
+    _guild_payloads: Dict[int, bytes]
+    _stats_cache: TTLCache[str, BotStats]
+    _stats_requests: SingleFlight[str, BotStats]
+
+    def __init__(self, bot: ExultBot, *, port: int = 3000) -> None:
+        super().__init__(bot, port=port)
+        # The dashboard polls our stats, so the merged stats of every cluster are
+        # reused for a few seconds rather than asking each cluster every time
+        self._stats_cache = TTLCache(maxsize=1, ttl=5.0)
+        self._stats_requests = SingleFlight()
+
+        # Guild ID -> the guild serialised by `_guild_to_dict`, dropped whenever the
+        # guild or one of its channels changes
+        self._guild_payloads = {}
+        for event in (
+            "on_guild_update",
+            "on_guild_available",
+            "on_guild_unavailable",
+            "on_guild_remove",
+            "on_guild_channel_create",
+            "on_guild_channel_update",
+            "on_guild_channel_delete",
+        ):
+            bot.add_listener(self._invalidate_guild_payload, event)
+
+    async def _invalidate_guild_payload(self, obj: Any, *_: Any) -> None:
+        # Guild events pass the guild, channel events pass the channel
+        guild = obj if isinstance(obj, discord.Guild) else obj.guild
+        self._guild_payloads.pop(guild.id, None)
+
+    def _guild_payload(self, guild: Guild) -> bytes:
+        """Returns the guild serialised by :meth:`_guild_to_dict`, from cache if possible"""
+
+        payload = self._guild_payloads.get(guild.id)
+        if payload is None:
+            payload = self._guild_payloads[guild.id] = dumps(self._guild_to_dict(guild))
+        return payload
+
+    def _guild_to_dict(
+        self, guild: Guild, fields: Optional[Sequence[str]] = None
+    ) -> MinimalDiscordGuild:
         """
         Returns a :class:`MinimalDiscordGuild` containing all the information about a
-        given guild that our API needs
+        given guild that our API needs, or only the given `fields` of it
         """
 
-        return {
-            "channels": [
-                {
-                    "category": {"id": c.category.id, "name": c.category.name}
-                    if c.category
-                    else None,
-                    "id": c.id,
-                    "name": c.name,
-                    "type": c.type.value,
-                }
-                for c in guild.channels
-            ],
-            "emojis": [],
-            "icon": guild.icon.url if guild.icon else None,
-            "id": guild.id,
-            "name": guild.name,
-            "owner_id": guild.owner_id,
-            "premium_tier": guild.premium_tier,
-            "roles": [],
-            "unavailable": guild.unavailable,
-        }
+        return cast(
+            MinimalDiscordGuild,
+            {name: GUILD_FIELDS[name](guild) for name in (fields or GUILD_FIELDS)},
+        )
 
     def _user_to_dict(self, user: User) -> MinimalDiscordUser:
         """
@@ -57,38 +148,372 @@ class ExultBotIPC(IPCBase):
             "global_name": user.global_name,
         }
 
+    async def _fetch_cluster_stats(
+        self, cluster_id: int, port: int
+    ) -> Optional[ClusterStats]:
+        """Returns the stats of another cluster, or None if it can't be reached"""
+
+        try:
+            async with self.bot.session.get(
+                f"http://127.0.0.1:{port}/stats/local",
+                timeout=aiohttp.ClientTimeout(total=2.0),
+            ) as r:
+                r.raise_for_status()
+                return await r.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warn(f"Failed to fetch stats of cluster {cluster_id}: {e}")
+            return None
+
+    async def _aggregate_stats(self) -> BotStats:
+        """Merges our stats with those of every other cluster"""
+
+        peers = list(self.bot.ipc_peers.items())
+        results = await asyncio.gather(
+            *(self._fetch_cluster_stats(cluster_id, port) for cluster_id, port in peers)
+        )
+
+        clusters: List[ClusterStats] = [self.bot.stats.snapshot()]
+        for (cluster_id, _), result in zip(peers, results):
+            clusters.append(
+                result
+                or {
+                    "cluster_id": cluster_id,
+                    "shards": None,
+                    "online": False,
+                    "guilds": 0,
+                    "users": {"total": 0, "unique": 0},
+                }
+            )
+        clusters.sort(key=lambda c: c["cluster_id"] or 0)
+
+        stats: BotStats = {
+            "guilds": sum(c["guilds"] for c in clusters),
+            "users": {
+                "total": sum(c["users"]["total"] for c in clusters),
+                "unique": sum(c["users"]["unique"] for c in clusters),
+            },
+            "clusters": clusters,
+        }
+        self._stats_cache.set("stats", stats)
+        return stats
+
     @route("/stats", method=Methods.get)
     async def stats(self, req: web.Request) -> web.Response:
-        """Returns some basic statistics about Exult Bot"""
+        """
+        Returns some basic statistics about Exult Bot, merged across every cluster.
+
+        Unique users are only unique within a cluster, a user sharing guilds with
+        more than one cluster is counted once by each.
+        """
 
-        return web.json_response(
+        stats = self._stats_cache.get("stats")
+        if stats is None:
+            stats = await self._stats_requests.run("stats", self._aggregate_stats)
+        return json_response(stats)
+
+    @route("/stats/local", method=Methods.get)
+    async def local_stats(self, req: web.Request) -> web.Response:
+        """Returns the statistics of this cluster only"""
+
+        return json_response(self.bot.stats.snapshot())
+
+    @route("/stats/caches", method=Methods.get)
+    async def cache_stats(self, req: web.Request) -> web.Response:
+        """Returns the sizes and hit rates of this cluster's caches"""
+
+        return json_response(
             {
-                "guilds": len(self.bot.guilds),
-                "users": {
-                    "total": sum(g.member_count or 0 for g in self.bot.guilds),
-                    "unique": len(self.bot.users),
-                },
+                "cluster_id": self.bot.cluster_id,
+                "images": image_cache_stats(),
+                "users": self.bot.user_resolver.stats(),
+                "guild_payloads": len(self._guild_payloads),
             }
         )
 
     @route("/users/{id}", method=Methods.get)
     async def get_user(self, request: web.Request) -> web.Response:
-        """Returns some basic information on a given user"""
+        """
+        Returns some basic information on a given user.
+
+        Users that aren't cached by this cluster are fetched from Discord, so every
+        cluster returns the same user.
+        """
 
         user_id = int(request.match_info["id"])
         user = await self.bot.get_or_fetch_user(user_id)
         if not user:
-            return web.json_response({"error": "User not found."}, status=404)
-        return web.json_response(self._user_to_dict(user))
+            return json_response({"error": "User not found."}, status=404)
+        return conditional_response(request, dumps(self._user_to_dict(user)))
+
+    @route("/users/batch", method=Methods.post)
+    async def get_users(self, request: web.Request) -> web.Response:
+        """
+        Returns basic information on many users at once.
+
+        Expects a body of `{"ids": [...]}`. Users are served from our caches where
+        possible and the rest are fetched concurrently by our user resolver. IDs that
+        aren't users are listed in `not_found`, and IDs that couldn't be fetched in
+        `failed`.
+        """
+
+        try:
+            data = await request.json()
+            user_ids = list(dict.fromkeys(int(i) for i in data["ids"]))
+        except (ValueError, TypeError, KeyError):
+            return json_response({"error": "Expected a list of user IDs."}, status=400)
+        if len(user_ids) > self.MAX_BATCH_SIZE:
+            return json_response(
+                {"error": f"Cannot request more than {self.MAX_BATCH_SIZE} users."},
+                status=400,
+            )
+
+        resolver = self.bot.user_resolver
+        users: List[MinimalDiscordUser] = []
+        missing: List[int] = []
+        for user_id in user_ids:
+            user = resolver.get(user_id)
+            if user:
+                users.append(self._user_to_dict(user))
+            else:
+                missing.append(user_id)
+
+        not_found: List[int] = []
+        failed: List[int] = []
+        results = await asyncio.gather(
+            *(resolver.fetch(user_id) for user_id in missing), return_exceptions=True
+        )
+        for user_id, result in zip(missing, results):
+            if isinstance(result, discord.User):
+                users.append(self._user_to_dict(result))
+            elif isinstance(result, BaseException):
+                failed.append(user_id)
+            else:
+                not_found.append(user_id)
+
+        return json_response({"users": users, "not_found": not_found, "failed": failed})
+
+    async def _stream_json(
+        self,
+        request: web.Request,
+        prefix: bytes,
+        items: Iterable[bytes],
+        suffix: bytes,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> web.StreamResponse:
+        """Streams a JSON array with chunked encoding, one item at a time"""
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "application/json", **(headers or {})}
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        await response.write(prefix)
+        for i, item in enumerate(items):
+            await response.write(b"," + item if i else item)
+        await response.write(suffix)
+        await response.write_eof()
+        return response
+
+    def _parse_guild_fields(
+        self, request: web.Request
+    ) -> Tuple[Optional[List[str]], Optional[web.Response]]:
+        """Returns the `?fields=` of a guilds request, or an error response"""
+
+        if "fields" not in request.query:
+            return None, None
+        fields = [f.strip() for f in request.query["fields"].split(",") if f.strip()]
+        unknown = set(fields).difference(GUILD_FIELDS)
+        if unknown:
+            return None, json_response(
+                {"error": f"Unknown guild fields: {', '.join(sorted(unknown))}"},
+                status=400,
+            )
+        return fields, None
+
+    def _guild_payloads(
+        self, guilds: Iterable[Guild], fields: Optional[List[str]]
+    ) -> Iterator[bytes]:
+        """Serialises the given guilds one at a time, as they are consumed"""
+
+        for guild in guilds:
+            if fields is None:
+                yield self._guild_payload(guild)
+            else:
+                yield dumps(self._guild_to_dict(guild, fields))
+
+    async def _open_cluster_guilds(
+        self, cluster_id: int, port: int, user_id: int, fields: Optional[List[str]]
+    ) -> Optional[Tuple[int, aiohttp.ClientResponse]]:
+        """
+        Requests the guilds another cluster shares with a user, returning how many
+        there are and the response with its body still unread, or None if the
+        cluster can't be reached. The caller must release the response.
+        """
+
+        params = {"fields": ",".join(fields)} if fields is not None else {}
+        try:
+            r = await self.bot.session.get(
+                f"http://127.0.0.1:{port}/users/{user_id}/guilds/local",
+                params=params,
+                # Bodies are read as they are piped to our own response, so only the
+                # connection and each read are limited rather than the whole request
+                timeout=aiohttp.ClientTimeout(total=None, connect=2.0, sock_read=2.0),
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warn(f"Failed to fetch guilds of cluster {cluster_id}: {e}")
+            return None
+        try:
+            r.raise_for_status()
+            return int(r.headers["X-Guild-Count"]), r
+        except (aiohttp.ClientError, KeyError, ValueError) as e:
+            r.release()
+            self.logger.warn(f"Failed to fetch guilds of cluster {cluster_id}: {e}")
+            return None
+
+    async def _pipe_array_items(
+        self, response: web.StreamResponse, peer: aiohttp.ClientResponse
+    ) -> None:
+        """Writes the items of a peer's JSON array to our response, minus its brackets"""
+
+        # The last byte read is held back, as it may be the closing bracket
+        held = b""
+        first = True
+        async for chunk in peer.content.iter_chunked(self.PIPE_CHUNK_SIZE):
+            if first:
+                chunk = chunk[1:]
+                first = False
+            data = held + chunk
+            if len(data) > 1:
+                await response.write(data[:-1])
+            held = data[-1:]
+
+    async def _stream_user_guilds(
+        self,
+        request: web.Request,
+        prefix: bytes,
+        payloads: Iterator[bytes],
+        peers: List[Tuple[int, aiohttp.ClientResponse]],
+        suffix: bytes,
+    ) -> web.StreamResponse:
+        """Streams our own guilds one at a time, followed by the body of each peer"""
+
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        await response.write(prefix)
+        written = False
+        for payload in payloads:
+            await response.write(b"," + payload if written else payload)
+            written = True
+        for cluster_id, peer in peers:
+            if written:
+                await response.write(b",")
+            try:
+                await self._pipe_array_items(response, peer)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Our headers are sent and the body is half written, so all we can do
+                # is abort the response rather than send invalid JSON
+                self.logger.error(f"Lost cluster {cluster_id} whilst streaming: {e}")
+                raise
+            written = True
+        await response.write(suffix)
+        await response.write_eof()
+        return response
+
+    @route("/users/{id}/guilds/local", method=Methods.get)
+    async def get_local_user_guilds(self, request: web.Request) -> web.StreamResponse:
+        """
+        Streams the guilds of this cluster only that Exult Bot shares with the given
+        user, as a JSON array. Takes the same `?fields=` as `/users/{id}/guilds`.
+        """
+
+        fields, error = self._parse_guild_fields(request)
+        if error is not None:
+            return error
+
+        # The index is always built when our IPC server is enabled
+        assert self.bot.mutual_index
+        guilds = self.bot.mutual_index.mutual_guilds(int(request.match_info["id"]))
+        return await self._stream_json(
+            request,
+            b"[",
+            self._guild_payloads(guilds, fields),
+            b"]",
+            headers={"X-Guild-Count": str(len(guilds))},
+        )
 
     @route("/users/{id}/guilds", method=Methods.get)
-    async def get_user_guilds(self, request: web.Request) -> web.Response:
-        """Returns the guilds that Exult Bot shares with the given user"""
+    async def get_user_guilds(self, request: web.Request) -> web.StreamResponse:
+        """
+        Returns the guilds that Exult Bot shares with the given user, merged across
+        every cluster.
+
+        `?fields=id,name,icon` only includes the given fields of each guild. Clusters
+        that couldn't be reached are listed in `unavailable_clusters`, their guilds
+        are missing from the response. The response is streamed when `?stream=true`
+        is passed or the user shares more than `STREAM_THRESHOLD` guilds with us, our
+        guilds being serialised one at a time and each cluster's body piped through
+        as it arrives. Otherwise it is stitched together from the cached payload of
+        each guild and carries an ETag so the dashboard can revalidate it without a
+        new body.
+        """
+
+        fields, error = self._parse_guild_fields(request)
+        if error is not None:
+            return error
 
         user_id = int(request.match_info["id"])
-        user = await self.bot.get_or_fetch_user(user_id)
-        if not user:
-            return web.json_response({"error": "User not found."}, status=404)
-        user_data = self._user_to_dict(user)
-        user_data["guilds"] = [self._guild_to_dict(g) for g in user.mutual_guilds]
-        return web.json_response(user_data)
+        clusters = list(self.bot.ipc_peers.items())
+        user, opened = await asyncio.gather(
+            self.bot.get_or_fetch_user(user_id),
+            asyncio.gather(
+                *(
+                    self._open_cluster_guilds(cluster_id, port, user_id, fields)
+                    for cluster_id, port in clusters
+                )
+            ),
+        )
+        try:
+            if not user:
+                return json_response({"error": "User not found."}, status=404)
+
+            assert self.bot.mutual_index
+            guilds = self.bot.mutual_index.mutual_guilds(user.id)
+            count = len(guilds)
+            peers: List[Tuple[int, aiohttp.ClientResponse]] = []
+            unavailable: List[int] = []
+            for (cluster_id, _), result in zip(clusters, opened):
+                if result is None:
+                    unavailable.append(cluster_id)
+                elif result[0]:
+                    count += result[0]
+                    peers.append((cluster_id, result[1]))
+
+            # Splice the guilds into the serialised user object, before its last brace
+            prefix = dumps(self._user_to_dict(user))[:-1] + b',"guilds":['
+            payloads = self._guild_payloads(guilds, fields)
+            if request.query.get("stream") == "true" or count > self.STREAM_THRESHOLD:
+                suffix = b'],"unavailable_clusters":' + dumps(unavailable) + b"}"
+                return await self._stream_user_guilds(
+                    request, prefix, payloads, peers, suffix
+                )
+
+            # Few enough guilds to buffer, which lets the response carry an ETag
+            items = list(payloads)
+            for cluster_id, peer in peers:
+                try:
+                    body = await peer.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.logger.warn(
+                        f"Failed to read guilds of cluster {cluster_id}: {e}"
+                    )
+                    unavailable.append(cluster_id)
+                    continue
+                items.append(body[1:-1])
+            suffix = b'],"unavailable_clusters":' + dumps(sorted(unavailable)) + b"}"
+            return conditional_response(request, prefix + b",".join(items) + suffix)
+        finally:
+            for result in opened:
+                if result is not None:
+                    result[1].release()
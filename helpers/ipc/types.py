@@ -38,3 +38,24 @@ class MinimalDiscordUser(TypedDict, total=False):
     avatar: str
     global_name: Optional[str]
     guilds: List[MinimalDiscordGuild]
+    # Clusters whose guilds are missing from `guilds` as they couldn't be reached
+    unavailable_clusters: List[int]
+
+
+class UserStats(TypedDict):
+    total: int
+    unique: int
+
+
+class ClusterStats(TypedDict):
+    cluster_id: Optional[int]
+    shards: Optional[List[int]]
+    online: bool
+    guilds: int
+    users: UserStats
+
+
+class BotStats(TypedDict):
+    guilds: int
+    users: UserStats
+    clusters: List[ClusterStats]
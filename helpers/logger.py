@@ -1,14 +1,175 @@
 from __future__ import annotations
 
 # Core Imports
+import atexit
 import datetime
+import json
 import os
-from typing import Dict, Literal, Union
+import queue
+import threading
+import traceback
+from typing import IO, Any, Dict, List, Literal, Optional, Tuple, Union
+
+__all__ = ("LogLevel", "LogWriter", "Logger")
+
+
+# Logger name, date of the log file, formatted line
+LogRecord = Tuple[str, datetime.date, str]
+
+LogLevel = Literal["debug", "info", "warning", "error", "critical"]
+
+
+class LogWriter:
+    """
+    Writes log lines to their files from a background thread.
+
+    Loggers only put their lines on a bounded queue, so logging never blocks the
+    event loop on disk I/O. The writer keeps each logger's file for the current day
+    open, writes everything that has queued up in one go and flushes after each
+    batch. A logger's file is swapped for the next day's file when the first line
+    dated after midnight arrives.
+
+    If the queue is full the line is dropped and counted rather than blocking the
+    caller, a note of how many lines were dropped is written to the `LogWriter` log.
+    """
+
+    _files: Dict[str, Tuple[datetime.date, IO[str]]]
+    _queue: queue.Queue[Optional[LogRecord]]
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, *, maxsize: int = 10_000, batch_size: int = 500) -> None:
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._files = {}
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def path(name: str, date: datetime.date) -> str:
+        return f"logs/{name}/{date}-log.log"
+
+    def write(self, name: str, date: datetime.date, text: str) -> None:
+        """Queues a line to be written to the given logger's file"""
+
+        if self._closed:
+            # Nothing left to hand the line to, write it ourselves
+            with open(self.path(name, date), "a") as f:
+                f.write(f"{text}\n")
+            return
+
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait((name, date, text))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Starts the writer thread"""
+
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name="LogWriter", daemon=True
+                )
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Writes out every queued line and closes the log files"""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            # Blocking put, the sentinel must not be dropped
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _file(self, name: str, date: datetime.date) -> IO[str]:
+        current = self._files.get(name)
+        if current is not None:
+            if current[0] == date:
+                return current[1]
+            current[1].close()
+
+        os.makedirs(f"logs/{name}", exist_ok=True)
+        f = open(self.path(name, date), "a")
+        self._files[name] = (date, f)
+        return f
+
+    def _write_batch(self, batch: List[LogRecord]) -> None:
+        written: Dict[str, IO[str]] = {}
+        for name, date, text in batch:
+            f = self._file(name, date)
+            f.write(f"{text}\n")
+            written[name] = f
+
+        dropped = self.dropped
+        if dropped != self._reported_dropped:
+            now = datetime.datetime.now()
+            f = self._file("LogWriter", now.date())
+            f.write(
+                f"{now.strftime('%d/%m %H:%M:%S')} [LOGWRITER] WARNING: "
+                f"Dropped {dropped - self._reported_dropped} log lines, queue full.\n"
+            )
+            written["LogWriter"] = f
+            self._reported_dropped = dropped
+
+        for f in written.values():
+            f.flush()
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            record = self._queue.get()
+            batch: List[LogRecord] = []
+            while True:
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except OSError as e:
+                print(f"LogWriter failed to write {len(batch)} log lines: {e}")
+
+        for _, f in self._files.values():
+            f.close()
+        self._files.clear()
 
 
 class Logger:
     """Custom Logger, writes logs to files and optionally to the console"""
 
+    # Shared by every logger, writes their lines to file off the event loop
+    writer: LogWriter = LogWriter()
+
+    # Severity of each level, messages below `min_level` are discarded
+    LEVELS: Dict[str, int] = {
+        "debug": 10,
+        "info": 20,
+        "warning": 30,
+        "error": 40,
+        "critical": 50,
+    }
+
+    # Shared settings, see :meth:`configure`
+    min_level: int = LEVELS["debug"]
+    json_lines: bool = False
+
     def __init__(
         self,
         name: str,
@@ -27,58 +188,125 @@ class Logger:
         "critical": "[0;1;31;47m{}[0m",
     }
 
-    def to_file(self, text: str) -> None:
-        """Writes the log message to the configured log file"""
+    @classmethod
+    def configure(
+        cls, *, level: Optional[LogLevel] = None, json_lines: Optional[bool] = None
+    ) -> None:
+        """
+        Configures every logger.
+
+        `level` sets the minimum severity that is logged, and `json_lines` switches
+        the log files to one JSON object per line for our log shipper to ingest.
+        """
 
-        filename = datetime.datetime.now().date()
-        with open(f"logs/{self.name}/{filename}-log.log", "a") as f:
-            f.write(f"{text}\n")
+        if level is not None:
+            cls.min_level = cls.LEVELS[level]
+        if json_lines is not None:
+            cls.json_lines = json_lines
+
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        """Whether messages of the given level are logged, to skip building expensive messages"""
+        return self.LEVELS[level] >= self.min_level
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Writes out any queued log lines, should be called before exiting"""
+        cls.writer.close()
+
+    def to_file(self, text: str, *, date: Optional[datetime.date] = None) -> None:
+        """Queues the log message to be written to the configured log file"""
+
+        self.writer.write(self.name, date or datetime.date.today(), text)
 
     def format(
         self,
         message: str,
         *,
-        level: Literal["debug", "info", "warning", "error", "critical"] = "info",
+        level: LogLevel = "info",
+        exception: Optional[BaseException] = None,
+        **context: Any,
     ) -> None:
-        """Formats and dispatches the log message"""
+        """
+        Formats and dispatches the log message.
 
+        Any keyword arguments, e.g. `guild_id` or `command`, are attached to the message
+        as context. The formatted traceback of `exception` is written after the message,
+        or in its own `traceback` field when writing JSON lines.
+        """
+
+        if self.LEVELS[level] < self.min_level:
+            return
+
+        now = datetime.datetime.now()
         log_message = (
-            f"{datetime.datetime.now().strftime('%d/%m %H:%M:%S')} "
+            f"{now.strftime('%d/%m %H:%M:%S')} "
             f"[{self.name.upper()}] {level.upper()}: {message}"
         )
-        self.to_file(log_message)
+        if context:
+            log_message += " (" + ", ".join(f"{k}={v}" for k, v in context.items()) + ")"
+        formatted_tb = (
+            "".join(traceback.format_exception(exception)).rstrip()
+            if exception is not None
+            else None
+        )
+
+        if self.json_lines:
+            record = {
+                "timestamp": now.astimezone().isoformat(),
+                "logger": self.name,
+                "level": level,
+                "message": message,
+                **context,
+            }
+            if formatted_tb is not None:
+                record["traceback"] = formatted_tb
+            self.to_file(json.dumps(record, default=str), date=now.date())
+        else:
+            if formatted_tb is not None:
+                log_message += "\n" + formatted_tb
+            self.to_file(log_message, date=now.date())
+
         if self.console:
-            log_type = self.LEVEL_COLOURS.get(level, "[0;1;35m{}[0m").format(
+            log_type = self.LEVEL_COLOURS.get(level, "[0;1;35m{}[0m").format(
                 level.upper()
             )
             print(f"{self.name} | {log_type} {log_message}")
 
-    def info(self, message: str) -> None:
+    def info(self, message: str, **context: Any) -> None:
         """Logs the given message with severity `INFO`"""
 
-        self.format(message, level="info")
+        self.format(message, level="info", **context)
 
-    def warn(self, message: str) -> None:
+    def warn(self, message: str, **context: Any) -> None:
         """Logs the given message with severity `WARN`"""
 
-        self.format(message, level="warning")
+        self.format(message, level="warning", **context)
 
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, **context: Any) -> None:
         """Logs the given message with severity `DEBUG`"""
 
-        self.format(message, level="debug")
+        self.format(message, level="debug", **context)
 
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, **context: Any) -> None:
         """Logs the given message with severity `CRITICAL`"""
 
-        self.format(message, level="critical")
+        self.format(message, level="critical", **context)
 
-    def error(self, message: Union[str, Exception]) -> None:
+    def error(self, message: Union[str, Exception], **context: Any) -> None:
         """Logs the given message with severity `ERROR`"""
 
-        message = (
-            str(message) + str(message.__traceback__)
-            if isinstance(message, Exception)
-            else message
-        )
-        self.format(message, level="error")
+        if not self.is_enabled_for("error"):
+            return
+        if isinstance(message, Exception):
+            exception = message
+            self.format(
+                f"{type(exception).__name__}: {exception}",
+                level="error",
+                exception=exception,
+                **context,
+            )
+        else:
+            self.format(message, level="error", **context)
+
+
+atexit.register(Logger.shutdown)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+# Core Imports
+from typing import Dict, List, NamedTuple, TYPE_CHECKING
+
+# Local Imports
+from .cache import TTLCache
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("MessageIndex", "SavedMessage")
+
+
+class SavedMessage(NamedTuple):
+    """The fields of a saved message that the message builder views list"""
+
+    guild_id: int
+    name: str
+
+
+class MessageIndex:
+    """
+    In-memory index of each guild's saved messages.
+
+    Only what the message builder views list is held (each message's name), never
+    a message's content or embeds. A guild is loaded from the database the first
+    time it is needed and is then kept up to date as messages are created and
+    deleted, so the views can rebuild themselves without querying the database.
+
+    Guilds expire after `ttl` seconds so that changes made outside of the bot,
+    e.g. from the web dashboard, are eventually picked up.
+    """
+
+    _guilds: TTLCache[int, Dict[str, SavedMessage]]
+
+    def __init__(
+        self, bot: ExultBot, *, maxsize: int = 5000, ttl: float = 600.0
+    ) -> None:
+        self.bot = bot
+        self._guilds = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, guild_id: int) -> List[SavedMessage]:
+        """Returns the saved messages of the given guild"""
+
+        messages = self._guilds.get(guild_id)
+        if messages is None:
+            rows = await self.bot.db.message.find_many(where={"guild_id": guild_id})
+            messages = {m.name: SavedMessage(m.guild_id, m.name) for m in rows}
+            self._guilds.set(guild_id, messages)
+        return list(messages.values())
+
+    def add(self, guild_id: int, name: str) -> None:
+        """Adds a newly saved message to its guild's index, if the guild is loaded"""
+
+        # Peeked, as updating the index shouldn't count towards its hit rate
+        messages = self._guilds.peek(guild_id)
+        if messages is not None:
+            messages[name] = SavedMessage(guild_id, name)
+
+    def remove(self, guild_id: int, name: str) -> None:
+        """Removes a deleted message from its guild's index, if the guild is loaded"""
+
+        messages = self._guilds.peek(guild_id)
+        if messages is not None:
+            messages.pop(name, None)
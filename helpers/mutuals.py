@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+# Core Imports
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
+
+# Third Party Packages
+import discord
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("MutualGuildIndex",)
+
+
+class MutualGuildIndex:
+    """
+    Reverse index of user ID -> IDs of the guilds we share with that user.
+
+    `user.mutual_guilds` walks every guild we are in, while a lookup here only costs
+    as much as the number of guilds the user is in. The index is built from the
+    member cache when we become ready and is then kept up to date by guild and member
+    events. :meth:`verify` compares it against the member cache.
+    """
+
+    _guilds: Dict[int, Set[int]]
+
+    def __init__(self, bot: ExultBot) -> None:
+        self.bot = bot
+        self._guilds = {}
+
+        bot.add_listener(self.rebuild, "on_ready")
+        bot.add_listener(self.add_guild, "on_guild_available")
+        bot.add_listener(self.add_guild, "on_guild_join")
+        bot.add_listener(self.remove_guild, "on_guild_remove")
+        bot.add_listener(self.on_member_join, "on_member_join")
+        bot.add_listener(self.on_raw_member_remove, "on_raw_member_remove")
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def _add(self, user_id: int, guild_id: int) -> None:
+        self._guilds.setdefault(user_id, set()).add(guild_id)
+
+    def _remove(self, user_id: int, guild_id: int) -> None:
+        guild_ids = self._guilds.get(user_id)
+        if guild_ids is not None:
+            guild_ids.discard(guild_id)
+            if not guild_ids:
+                del self._guilds[user_id]
+
+    def _build(self) -> Dict[int, Set[int]]:
+        index: Dict[int, Set[int]] = {}
+        for guild in self.bot.guilds:
+            for member in guild.members:
+                index.setdefault(member.id, set()).add(guild.id)
+        return index
+
+    def guild_ids(self, user_id: int) -> Set[int]:
+        """Returns the IDs of the guilds we share with the given user"""
+        return set(self._guilds.get(user_id, ()))
+
+    def mutual_guilds(self, user_id: int) -> List[discord.Guild]:
+        """Returns the guilds we share with the given user"""
+
+        guilds: List[discord.Guild] = []
+        for guild_id in self._guilds.get(user_id, ()):
+            guild = self.bot.get_guild(guild_id)
+            if guild is not None:
+                guilds.append(guild)
+        return guilds
+
+    async def rebuild(self) -> None:
+        """Rebuilds the whole index from the member cache"""
+        self._guilds = self._build()
+
+    async def add_guild(self, guild: discord.Guild) -> None:
+        """Indexes every cached member of the guild, e.g. after it has been chunked"""
+
+        for member in guild.members:
+            self._add(member.id, guild.id)
+
+    async def remove_guild(self, guild: discord.Guild) -> None:
+        for member in guild.members:
+            self._remove(member.id, guild.id)
+
+    async def on_member_join(self, member: discord.Member) -> None:
+        self._add(member.id, member.guild.id)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
+        self._remove(payload.user.id, payload.guild_id)
+
+    def verify(self, *, repair: bool = False) -> Tuple[int, int]:
+        """
+        Compares the index against the member cache.
+
+        Returns the number of (user, guild) pairs that are missing from the index and
+        the number that are in the index but not the member cache. If `repair` is
+        True the index is replaced with one built from the member cache.
+        """
+
+        expected = self._build()
+        missing = extra = 0
+        for user_id in expected.keys() | self._guilds.keys():
+            have = self._guilds.get(user_id, set())
+            want = expected.get(user_id, set())
+            missing += len(want - have)
+            extra += len(have - want)
+
+        if repair:
+            self._guilds = expected
+        return missing, extra
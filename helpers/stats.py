@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+# Core Imports
+from typing import Dict, Optional, TYPE_CHECKING
+
+# Third Party Packages
+import discord
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+    from helpers.ipc.types import ClusterStats
+
+__all__ = ("StatsTracker",)
+
+
+class StatsTracker:
+    """
+    Keeps running totals of our guild and member counts.
+
+    The totals are updated from guild and member events as they happen, so reading
+    them is O(1) instead of walking every guild. They are recomputed from scratch
+    whenever we (re)connect to the gateway in case any events were missed.
+    """
+
+    _member_counts: Dict[int, int]
+
+    def __init__(self, bot: ExultBot) -> None:
+        self.bot = bot
+        self.members = 0
+        # Guild ID -> the member count last added to `members`
+        self._member_counts = {}
+
+        bot.add_listener(self.recompute, "on_ready")
+        bot.add_listener(self.update_guild, "on_guild_available")
+        bot.add_listener(self.update_guild, "on_guild_join")
+        bot.add_listener(self.update_guild, "on_guild_update")
+        bot.add_listener(self.remove_guild, "on_guild_remove")
+        bot.add_listener(self.on_member_join, "on_member_join")
+        bot.add_listener(self.on_raw_member_remove, "on_raw_member_remove")
+
+    @property
+    def guilds(self) -> int:
+        return len(self._member_counts)
+
+    async def recompute(self) -> None:
+        self._member_counts = {g.id: g.member_count or 0 for g in self.bot.guilds}
+        self.members = sum(self._member_counts.values())
+
+    async def update_guild(
+        self, guild: discord.Guild, after: Optional[discord.Guild] = None
+    ) -> None:
+        # `on_guild_update` passes the guild before and after the update
+        guild = after or guild
+        count = guild.member_count or 0
+        self.members += count - self._member_counts.get(guild.id, 0)
+        self._member_counts[guild.id] = count
+
+    async def remove_guild(self, guild: discord.Guild) -> None:
+        self.members -= self._member_counts.pop(guild.id, 0)
+
+    async def on_member_join(self, member: discord.Member) -> None:
+        await self.update_guild(member.guild)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is not None:
+            await self.update_guild(guild)
+
+    def snapshot(self) -> ClusterStats:
+        """Returns the current stats of this process"""
+
+        return {
+            "cluster_id": self.bot.cluster_id,
+            "shards": list(self.bot.shard_ids) if self.bot.shard_ids else None,
+            "online": True,
+            "guilds": self.guilds,
+            "users": {"total": self.members, "unique": self.bot.cached_user_count},
+        }
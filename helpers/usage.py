@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+from collections import Counter
+from types import TracebackType
+from typing import Any, List, Optional, Self, Tuple, Type, TYPE_CHECKING
+
+# Third Party Packages
+from prisma.enums import UsageMode
+
+# Local Imports
+from .cache import TTLCache
+from .logger import Logger
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+
+class UsageTracker:
+    """
+    Write-behind counter for app command usage.
+
+    Completed commands are aggregated in memory by `(command_name, invoker_id)`
+    and written to the database in bulk, either every `flush_interval` seconds
+    or as soon as `max_pending` distinct keys are waiting to be written.
+    """
+
+    # Invoker ID that usage is recorded against for users who hide their user ID.
+    # Their uses are merged into one shared row per command, so they still count
+    # towards a command's total but can't be told apart or attributed to anyone.
+    # No Discord snowflake is 0, so the row never collides with a real user
+    ANONYMOUS_INVOKER_ID = 0
+
+    # Rows written per statement, keeps us well under MySQL's placeholder limit
+    FLUSH_CHUNK_SIZE = 1000
+
+    _pending: Counter[Tuple[str, int]]
+    _modes: TTLCache[int, UsageMode]
+    _task: Optional[asyncio.Task[None]]
+    logger: Logger
+
+    def __init__(
+        self,
+        bot: ExultBot,
+        *,
+        flush_interval: float = 60.0,
+        max_pending: int = 500,
+    ) -> None:
+        self.bot = bot
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.logger = Logger("UsageTracker")
+
+        self._pending = Counter()
+        # Modes are only cached briefly, as a user may change theirs through another
+        # cluster and we must stop tracking them soon after
+        self._modes = TTLCache(maxsize=10_000, ttl=60.0)
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """The number of distinct `(command_name, invoker_id)` keys awaiting a flush"""
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """Starts the background task that periodically flushes pending usage"""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stops the background flush task and writes any remaining usage"""
+
+        # Let the loop finish its current flush rather than cancelling it mid-write
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def set_mode(self, user_id: int, mode: UsageMode) -> None:
+        """Updates the cached usage mode of a user after it has been changed"""
+        self._modes.set(user_id, mode)
+
+    async def get_mode(self, user_id: int) -> UsageMode:
+        """
+        Returns the usage mode of the given user, only querying the database
+        once their cached mode has expired.
+        """
+
+        mode = self._modes.get(user_id)
+        if mode is None:
+            user = await self.bot.db.user.find_unique(where={"user_id": user_id})
+            mode = user.usage_mode if user else UsageMode.share_user_id
+            self._modes.set(user_id, mode)
+        return mode
+
+    async def record(self, command_name: str, user_id: int) -> None:
+        """Records a single use of a command, respecting the invoker's usage mode"""
+
+        mode = await self.get_mode(user_id)
+        if mode == UsageMode.do_not_track:
+            return
+
+        invoker_id = (
+            self.ANONYMOUS_INVOKER_ID if mode == UsageMode.hide_user_id else user_id
+        )
+        self._pending[(command_name, invoker_id)] += 1
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Writes all pending usage to the database"""
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, Counter()
+
+            rows = list(pending.items())
+            for i in range(0, len(rows), self.FLUSH_CHUNK_SIZE):
+                chunk = rows[i : i + self.FLUSH_CHUNK_SIZE]
+                try:
+                    await self._write(chunk)
+                except Exception as e:
+                    # Put the counts back so they are retried on the next flush
+                    self._pending.update(dict(rows[i:]))
+                    self.logger.error(
+                        f"Failed to flush {len(rows) - i} usage rows: {type(e)}: {e}"
+                    )
+                    return
+
+    async def _write(self, rows: List[Tuple[Tuple[str, int], int]]) -> None:
+        values = ", ".join("(?, ?, ?)" for _ in rows)
+        params: List[Any] = []
+        for (command_name, invoker_id), uses in rows:
+            params.extend((command_name, invoker_id, uses))
+
+        # Row alias form, as `VALUES()` in the update clause is deprecated
+        await self.bot.db.execute_raw(
+            "INSERT INTO `Usage` (`command_name`, `invoker_id`, `uses`) "
+            f"VALUES {values} AS `new` "
+            "ON DUPLICATE KEY UPDATE `uses` = `Usage`.`uses` + `new`.`uses`",
+            *params,
+        )
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+# Core Imports
+import asyncio
+from typing import Dict, Optional, TYPE_CHECKING, Union
+
+# Third Party Packages
+import discord
+
+# Local Imports
+from .cache import SingleFlight, TTLCache
+
+# Type Imports
+if TYPE_CHECKING:
+    from bot import ExultBot
+
+__all__ = ("UserResolver",)
+
+
+class UserResolver:
+    """
+    Resolves user IDs to users, from our caches where possible.
+
+    Users that share a guild with us are taken from discord.py's member cache. Any
+    others are fetched from the Discord API and kept in an LRU cache for `ttl`
+    seconds, and IDs that Discord says don't exist are remembered for
+    `negative_ttl` seconds. Concurrent lookups of the same missing user share one
+    request, and at most `concurrency` requests are made at a time.
+    """
+
+    _fetched: TTLCache[int, discord.User]
+    _requests: SingleFlight[int, Optional[discord.User]]
+    _unknown: TTLCache[int, bool]
+
+    def __init__(
+        self,
+        bot: ExultBot,
+        *,
+        maxsize: int = 10_000,
+        ttl: float = 1800.0,
+        negative_ttl: float = 3600.0,
+        concurrency: int = 5,
+    ) -> None:
+        self.bot = bot
+        self._fetched = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._unknown = TTLCache(maxsize=maxsize * 5, ttl=negative_ttl)
+        self._requests = SingleFlight()
+        self._limiter = asyncio.Semaphore(concurrency)
+
+    def get(self, user_id: int) -> Optional[discord.User]:
+        """Returns the user if they are in any of our caches, without fetching them"""
+        return self.bot.get_user(user_id) or self._fetched.get(user_id)
+
+    def is_unknown(self, user_id: int) -> bool:
+        """Whether Discord recently told us that the ID isn't a user"""
+        return user_id in self._unknown
+
+    async def _fetch(self, user_id: int) -> Optional[discord.User]:
+        async with self._limiter:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.NotFound:
+                self._unknown.set(user_id, True)
+                return None
+        self._fetched.set(user_id, user)
+        return user
+
+    async def fetch(self, user_id: int) -> Optional[discord.User]:
+        """
+        Returns the user, fetching them if they aren't cached, or None if they don't exist.
+
+        Raises :class:`discord.HTTPException` if the request fails for any other reason.
+        """
+
+        user = self.get(user_id)
+        if user is not None:
+            return user
+        if self.is_unknown(user_id):
+            return None
+        return await self._requests.run(user_id, lambda: self._fetch(user_id))
+
+    async def resolve(self, user_id: int) -> Optional[discord.User]:
+        """Like :meth:`fetch`, but returns None if the request fails"""
+
+        try:
+            return await self.fetch(user_id)
+        except discord.HTTPException:
+            return None
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Returns the hit rates of the resolver's caches"""
+
+        return {
+            "fetched_size": len(self._fetched),
+            "fetched_hit_rate": round(self._fetched.hit_rate, 4),
+            "unknown_size": len(self._unknown),
+            "in_flight": len(self._requests),
+            "coalesced": self._requests.coalesced,
+        }
@@ -1,7 +1,7 @@
 # Core Imports
 import asyncio
 import os
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 # Third Party Packages
 import click
@@ -9,6 +9,13 @@ import dotenv
 
 # Local Imports
 from bot import ExultBot
+from helpers.cluster import (
+    ClusterConfig,
+    ClusterSupervisor,
+    fetch_recommended_shards,
+    split_shards,
+)
+from helpers.logger import Logger, LogLevel
 
 
 @click.command()
@@ -21,21 +28,152 @@ from bot import ExultBot
     show_default=True,
     help="Provide one or more guild IDs to sync app commands to. Default is -1 (Global commands).",
 )
-def cli(sync: bool, guilds: Tuple[int, ...]) -> None:
+@click.option(
+    "--log-level",
+    type=click.Choice(["debug", "info", "warning", "error", "critical"]),
+    default="debug",
+    show_default=True,
+    help="Minimum severity of messages to log.",
+)
+@click.option("--log-json", is_flag=True, help="Flag to write log files as JSON lines")
+@click.option(
+    "--member-cache/--no-member-cache",
+    default=None,
+    help="Override whether members are cached. Default is decided by the loaded cogs.",
+)
+@click.option(
+    "--chunk-guilds/--no-chunk-guilds",
+    default=None,
+    help="Override whether every guild's members are requested at startup. "
+    "Default is decided by the loaded cogs.",
+)
+@click.option(
+    "--shards",
+    type=int,
+    default=None,
+    help="Total number of shards. Default is the number Discord recommends.",
+)
+@click.option(
+    "--clusters",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of processes to split the shards between.",
+)
+@click.option(
+    "--ipc/--no-ipc",
+    default=True,
+    show_default=True,
+    help="Whether to run the IPC server that the dashboard reads from. It needs "
+    "every member cached, which is otherwise only done when a cog needs it.",
+)
+@click.option(
+    "--ipc-port",
+    type=int,
+    default=3000,
+    show_default=True,
+    help="IPC port of the first cluster, each further cluster uses the next port.",
+)
+def cli(
+    sync: bool,
+    guilds: Tuple[int, ...],
+    log_level: LogLevel,
+    log_json: bool,
+    member_cache: Optional[bool],
+    chunk_guilds: Optional[bool],
+    shards: Optional[int],
+    clusters: int,
+    ipc: bool,
+    ipc_port: int,
+) -> None:
     """
     CLI built into our launcher command that allows us to specify whether we want to
-    sync our app commands on launch.
+    sync our app commands on launch, how we want to log, what we want to cache and
+    how our shards are split between processes.
     """
-    asyncio.run(main(sync, guilds))
+    Logger.configure(level=log_level, json_lines=log_json)
+
+    if clusters <= 1:
+        # A single process owning every shard
+        config = ClusterConfig(
+            cluster_id=None,
+            shard_ids=None,
+            shard_count=shards,
+            ipc=ipc,
+            ipc_port=ipc_port,
+            ipc_peers={},
+            sync=sync,
+            guilds=guilds,
+            member_cache=member_cache,
+            chunk_guilds=chunk_guilds,
+            log_level=log_level,
+            log_json=log_json,
+        )
+        asyncio.run(main(config))
+        return
+
+    if shards is None:
+        dotenv.load_dotenv()
+        shards = asyncio.run(fetch_recommended_shards(os.environ["BOT_TOKEN"]))
+    if shards < clusters:
+        raise click.BadParameter(
+            f"Cannot split {shards} shards between {clusters} clusters.",
+            param_hint="--clusters",
+        )
+
+    configs: List[ClusterConfig] = [
+        ClusterConfig(
+            cluster_id=i,
+            shard_ids=shard_ids,
+            shard_count=shards,
+            ipc=ipc,
+            ipc_port=ipc_port + i,
+            ipc_peers={j: ipc_port + j for j in range(clusters) if j != i},
+            # Commands are global, only one cluster needs to sync them
+            sync=sync and i == 0,
+            guilds=guilds,
+            member_cache=member_cache,
+            chunk_guilds=chunk_guilds,
+            log_level=log_level,
+            log_json=log_json,
+        )
+        for i, shard_ids in enumerate(split_shards(shards, clusters))
+    ]
+    ClusterSupervisor(run_cluster, configs).run()
+
+
+def run_cluster(config: ClusterConfig) -> None:
+    """Entry point of each cluster process started by the supervisor"""
+
+    Logger.configure(level=config.log_level, json_lines=config.log_json)
+    try:
+        asyncio.run(main(config))
+    except KeyboardInterrupt:
+        pass
 
 
-async def main(sync: bool, guilds: Tuple[int, ...]) -> None:
+async def main(config: ClusterConfig) -> None:
     # Load our environment variables
     dotenv.load_dotenv()
 
     # Initialise and start our bot instance
-    bot = ExultBot(sync_on_ready=sync, guilds_to_sync=guilds)
-    await bot.start(os.environ["BOT_TOKEN"])
+    bot = ExultBot(
+        sync_on_ready=config.sync,
+        guilds_to_sync=config.guilds,
+        member_cache=config.member_cache,
+        chunk_guilds=config.chunk_guilds,
+        shard_ids=list(config.shard_ids) if config.shard_ids is not None else None,
+        shard_count=config.shard_count,
+        cluster_id=config.cluster_id,
+        ipc=config.ipc,
+        ipc_port=config.ipc_port,
+        ipc_peers=config.ipc_peers,
+    )
+    try:
+        await bot.start(os.environ["BOT_TOKEN"])
+    finally:
+        # Make sure every queued log line reaches its file
+        Logger.shutdown()
 
 
 if __name__ == "__main__":